@@ -22,9 +22,13 @@ from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.memory import ConversationBufferWindowMemory
 
-from .tools import ALL_TOOLS
+from .tools import ALL_TOOLS, READ_ONLY_TOOLS, Turn, await_pending_writes, run_with_turn_cache
 from .prompts import CANVAS_AGENT_SYSTEM_PROMPT, CANVAS_AGENT_INSTRUCTIONS
 from services.session_manager import SessionManager
+from services.response_cache import ResponseCache, canvas_state_hash, response_key
+from services.firebase_service import get_mirrored_shapes
+
+logger = logging.getLogger(__name__)
 
 # Configure dedicated logger for agent health monitoring
 agent_health_logger = logging.getLogger("agent_health")
@@ -40,6 +44,9 @@ _global_agent: Optional[AgentExecutor] = None
 _agent_creation_count = 0
 _last_health_check = None
 
+# Replies to read-only commands, reused while the canvas is unchanged
+_response_cache = ResponseCache()
+
 # Track file modification times for auto-reload
 _tools_file_mtime = None
 _prompts_file_mtime = None
@@ -187,6 +194,9 @@ def initialize_agent(reason: str = "startup") -> AgentExecutor:
         # Create agent without memory (memory managed per session)
         _global_agent = create_canvas_agent(memory=None)
         
+        # Cached replies came from the previous prompt and tools
+        _response_cache.clear()
+        
         # Update file modification times
         check_files_changed()
         
@@ -287,15 +297,27 @@ def execute_canvas_command(command: str, canvas_id: str = "main-canvas", user_id
         }
     """
     try:
-        print(f"Executing AI command: {command} (session: {session_id})")
+        logger.info("Executing AI command: %s (session: %s)", command, session_id)
         if viewport:
-            print(f"Viewport: {viewport}")
+            logger.info("Viewport: %s", viewport)
         
         # Check if tools.py or prompts.py changed - reload agent if needed
         if check_files_changed():
             agent_health_logger.info("🔄 Recreating agent due to file changes")
             initialize_agent(reason="file_change")
         
+        # Same question about the same canvas: answer from the cache
+        state_hash = _canvas_state(canvas_id)
+        cache_key = response_key(command, canvas_id, viewport, state_hash) if state_hash else None
+        cached = _response_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            logger.info("Answered from response cache: %s", command)
+            return {
+                "success": True,
+                "message": cached["message"],
+                "shapes": _tag_shapes(cached["shapes"], canvas_id, user_id, session_id),
+            }
+        
         # Use global agent (already initialized at startup)
         # Note: Memory is managed per session but agent is shared
         if _global_agent is None:
@@ -314,11 +336,13 @@ def execute_canvas_command(command: str, canvas_id: str = "main-canvas", user_id
             agent_input["input"] = f"{viewport_desc}\n\nUser command: {command}"
         
         # Execute command with timeout (20 seconds)
+        turn = Turn()
         try:
             with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(agent.invoke, agent_input)
+                future = executor.submit(run_with_turn_cache, turn, agent.invoke, agent_input)
                 result = future.result(timeout=20)
         except FuturesTimeoutError:
+            await_pending_writes(turn)
             agent_health_logger.error(f"⏱️  Command timed out after 20 seconds: {command}")
             return {
                 "success": False,
@@ -327,27 +351,31 @@ def execute_canvas_command(command: str, canvas_id: str = "main-canvas", user_id
                 "error": "Timeout after 20 seconds"
             }
         
+        # Make sure background shape writes from this turn have committed; tools
+        # report queued writes as done, so only this tells us they really landed
+        if not await_pending_writes(turn):
+            agent_health_logger.warning(f"⚠️  Some shape writes failed or are still pending: {command}")
+            return {
+                "success": False,
+                "message": "Some shapes could not be saved to the canvas. Please check the canvas and try again.",
+                "shapes": [],
+                "error": "Shape writes failed or did not finish"
+            }
+        
         # Extract shapes from the result
         shapes = extract_shapes_from_result(result)
         
-        # Add metadata to shapes
-        for shape in shapes:
-            if "id" not in shape:
-                import uuid
-                shape["id"] = str(uuid.uuid4())
-            
-            # Add metadata
-            shape["isAIGenerated"] = True
-            if canvas_id:
-                shape["canvasId"] = canvas_id
-            if user_id:
-                shape["createdBy"] = user_id
-            if session_id:
-                shape["sessionId"] = session_id
-        
         # Get the actual AI response message
         ai_message = result.get("output", f"Successfully executed command: {command}")
         
+        # Only a turn that left the canvas as it found it can be replayed later;
+        # the canvas is only re-read for turns that didn't call a writing tool
+        if cache_key is not None and _is_read_only(result):
+            if _canvas_state(canvas_id) == state_hash:
+                _response_cache.set(cache_key, {"message": ai_message, "shapes": shapes})
+        
+        shapes = _tag_shapes(shapes, canvas_id, user_id, session_id)
+        
         return {
             "success": True,
             "message": ai_message,
@@ -355,9 +383,7 @@ def execute_canvas_command(command: str, canvas_id: str = "main-canvas", user_id
         }
     
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error executing command: {error_details}")
+        logger.exception("Error executing command: %s", command)
         
         return {
             "success": False,
@@ -367,6 +393,60 @@ def execute_canvas_command(command: str, canvas_id: str = "main-canvas", user_id
         }
 
 
+def _canvas_state(canvas_id: str) -> Optional[str]:
+    """
+    Hash of a canvas's current shapes, or None to skip the response cache.
+    
+    Only hashes a live snapshot mirror; without one the cache is skipped
+    rather than paying a Firestore read on every command.
+    """
+    try:
+        shapes = get_mirrored_shapes(canvas_id)
+        if shapes is None:
+            return None
+        return canvas_state_hash(shapes)
+    except Exception as e:
+        logger.warning("Could not read canvas state for response cache: %s", e)
+        return None
+
+
+def _is_read_only(result: Dict[str, Any]) -> bool:
+    """Whether an agent turn called only tools that don't change the canvas."""
+    return all(
+        action.tool in READ_ONLY_TOOLS
+        for action, _ in result.get("intermediate_steps", ())
+    )
+
+
+def _tag_shapes(shapes: List[Dict[str, Any]], canvas_id: str, user_id: str, session_id: str) -> List[Dict[str, Any]]:
+    """
+    Add AI metadata to shapes returned by a command.
+    
+    Args:
+        shapes: Shapes extracted from the agent result
+        canvas_id: ID of the canvas
+        user_id: ID of the user making the request
+        session_id: Session ID of the browser tab
+    
+    Returns:
+        The same list, with ids and metadata filled in
+    """
+    for shape in shapes:
+        if "id" not in shape:
+            import uuid
+            shape["id"] = str(uuid.uuid4())
+        
+        # Add metadata
+        shape["isAIGenerated"] = True
+        if canvas_id:
+            shape["canvasId"] = canvas_id
+        if user_id:
+            shape["createdBy"] = user_id
+        if session_id:
+            shape["sessionId"] = session_id
+    return shapes
+
+
 def extract_shapes_from_result(result: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Extract shape data from agent execution result.
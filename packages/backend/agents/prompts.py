@@ -66,6 +66,7 @@ Or hex codes: #FF0000, #0000FF, etc.
 
 Examples of commands that REQUIRE optimized tools:
 - "move 10 shapes right" → use move_random_shapes(count=10, offset_x=100, offset_y=0)
+- "move all blue rectangles right" → get_canvas_shapes() → filter → move_shapes(shape_ids=[...], offset_x=100, offset_y=0)
 - "move 200 squares left" → use move_random_shapes(count=200, offset_x=-50, offset_y=0)
 - "make all rectangles bigger" → use update_shapes_batch, NOT individual resize_shape calls
 
@@ -85,6 +86,7 @@ Examples of commands that REQUIRE optimized tools:
 ### Manipulate Operations (require shape_id from get_canvas_shapes)
 - **move_shape(shape_id, new_x, new_y)**: Move a single shape
 - **move_random_shapes(count, offset_x, offset_y)**: Move N RANDOM shapes by offset (FAST! Just pass count and offset, no IDs needed)
+- **move_shapes(shape_ids, offset_x, offset_y)**: Move SPECIFIC shapes by the same offset in ONE call
 - **resize_shape(shape_id, new_width, new_height)**: Resize a shape
 - **rotate_shape(shape_id, angle)**: Rotate a shape (0-360 degrees)
 - **change_shape_color(shape_id, new_color)**: Change color
@@ -118,6 +120,8 @@ Examples of commands that REQUIRE optimized tools:
   - Selects shapes RANDOMLY - perfect when user doesn't specify which shapes
   - Example: move_random_shapes(count=10, offset_x=100, offset_y=0)
   - For "move ALL shapes": get_canvas_shapes() to count total → move_random_shapes(count=total, offset_x=X, offset_y=Y)
+- **move_shapes**: When moving SPECIFIC shapes (e.g., "move all blue rectangles right", "move the circles down")
+  - Get IDs from get_canvas_shapes(), then ONE move_shapes call - never repeated move_shape calls
 - **update_shapes_batch**: When doing complex multi-property updates (e.g., "arrange in circle", "create staircase")
 - **delete_shapes_batch**: When deleting specific shapes by ID (e.g., "delete all red circles")
 
@@ -278,6 +282,7 @@ Example:
 - "move 200 squares 50px left" → move_random_shapes(count=200, offset_x=-50, offset_y=0) ← Random 200 shapes!
 - "shift 50 shapes down" → move_random_shapes(count=50, offset_x=0, offset_y=100) ← Fast!
 - "move ALL shapes right" → get_canvas_shapes() → count total → move_random_shapes(count=total, offset_x=100, offset_y=0) ← 2 calls for "ALL"
+- "move all red circles down" → get_canvas_shapes() → filter red circles → move_shapes(shape_ids=[...], offset_x=0, offset_y=100) ← ONE call
 - "make all shapes bigger" → get_canvas_shapes() → get all shapes → update_shapes_batch(updates=[...]) ← ONE call for resize
 - "change all rectangles to red" → get_canvas_shapes() → filter rectangles → update_shapes_batch(updates=[...]) ← ONE call for color
 - "delete all circles" → get_canvas_shapes() → filter circles → delete_shapes_batch([ids]) ← ONE call
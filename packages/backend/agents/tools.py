@@ -3,25 +3,221 @@ LangChain Tools for Canvas Manipulation
 
 Simplified and optimized docstrings while maintaining full functionality.
 These tools allow the AI agent to create and manipulate shapes on the canvas.
+
+Each @tool is a thin wrapper around a plain `_<name>_impl` function. The wrapper
+carries the schema and description the LLM sees; internal callers can call the
+`_impl` directly and skip LangChain's per-call argument validation.
 """
 
 from langchain.tools import tool
-from typing import Optional, List, Dict, Any
-import uuid
+from langchain_core.tools import BaseTool
+from typing import Optional, List, Dict, Any, Tuple, Mapping
+from types import MappingProxyType
+from functools import lru_cache, wraps
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from contextvars import ContextVar
+import logging
+import threading
+import os
+import secrets
 import random
 
 # Import Firebase service for all shape operations
 from services.firebase_service import (
-    get_all_shapes,
+    get_all_shapes as _get_all_shapes,
     create_shape as create_shape_in_firestore,
     create_shapes_batch as create_shapes_batch_in_firestore,
-    update_shape as update_shape_in_firestore,
-    update_shapes_batch as update_shapes_batch_in_firestore,
-    delete_shape as delete_shape_from_firestore,
-    delete_shapes_batch as delete_shapes_batch_from_firestore,
+    create_shapes_batch_columnar as create_shapes_batch_columnar_in_firestore,
+    update_shape as _update_shape_in_firestore,
+    update_shapes_batch as _update_shapes_batch_in_firestore,
+    delete_shape as _delete_shape_from_firestore,
+    delete_shapes_batch as _delete_shapes_batch_from_firestore,
     shapes_to_simple_format
 )
 
+logger = logging.getLogger("tools")
+
+
+# ==================== PER-TURN STATE ====================
+
+class Turn:
+    """
+    State of one agent turn (one AI command)
+    
+    Holds the shapes read during the turn and the background writes it has
+    queued. Each concurrent command has its own Turn, so one request never
+    waits on, or reports, another request's writes.
+    """
+    
+    __slots__ = ("shapes", "writes", "failed", "lock")
+    
+    def __init__(self):
+        # canvas_id -> shapes read during this turn; any write clears it
+        self.shapes: Dict[str, List[Dict[str, Any]]] = {}
+        # Background writes not yet seen to finish
+        self.writes: List[Future] = []
+        # Set once any of this turn's background writes has failed
+        self.failed = False
+        self.lock = threading.Lock()
+
+
+# The Turn being run in the current context. Only set while
+# run_with_turn_cache is active.
+_current_turn: ContextVar[Optional[Turn]] = ContextVar("current_turn", default=None)
+
+
+def run_with_turn_cache(turn: Turn, fn, *args, **kwargs):
+    """
+    Run one agent turn with its own background writes and memoized shape reads.
+    
+    The agent is told to call get_canvas_shapes() before most operations, so a
+    single turn often reads the same canvas several times in a row.
+    
+    Args:
+        turn: State for this turn; pass it to await_pending_writes() afterwards
+        fn: Function running the turn (e.g. agent.invoke)
+    """
+    token = _current_turn.set(turn)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current_turn.reset(token)
+
+
+def _invalidate_turn_cache() -> None:
+    """Forget cached reads after a write."""
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.shapes.clear()
+
+
+# ==================== BACKGROUND WRITES ====================
+
+# Shape creations are committed on this pool so tools can return to the agent
+# without waiting for the Firestore round-trip. The frontend picks the shapes
+# up through its Firestore listeners once the commit lands.
+_WRITE_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="firestore-write")
+
+
+def _write_failed(future: Future) -> bool:
+    """Whether a finished background write raised or returned False."""
+    return future.cancelled() or future.exception() is not None or future.result() is False
+
+
+def _log_failure(future: Future) -> None:
+    """Report background writes that raised or returned False."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Background Firestore write failed: {error}")
+    elif future.result() is False:
+        logger.error("Background Firestore write reported failure")
+
+
+def submit_write(fn, *args, sync: bool = False, **kwargs) -> bool:
+    """
+    Run a Firestore write in the background and return immediately.
+    
+    Outside an agent turn there is nothing that would wait for the write, so
+    it runs inline instead.
+    
+    Args:
+        fn: Firestore service function to call
+        sync: Run the write inline and return its real result instead
+    
+    Returns:
+        True once the write is queued (optimistic), or the write's result when run inline
+    """
+    _invalidate_turn_cache()
+    
+    turn = _current_turn.get()
+    if sync or turn is None:
+        return fn(*args, **kwargs)
+    
+    future = _WRITE_POOL.submit(fn, *args, **kwargs)
+    future.add_done_callback(_log_failure)
+    with turn.lock:
+        turn.writes.append(future)
+    return True
+
+
+def await_pending_writes(turn: Optional[Turn] = None, timeout: float = 5.0) -> bool:
+    """
+    Block until a turn's queued background writes have finished.
+    
+    Called by the agent at the end of each turn, and before any read or
+    update so that tools always see the shapes created earlier in the turn.
+    Writes still running after the timeout stay queued for the next call.
+    
+    Args:
+        turn: Turn to wait for (default: the turn running in this context)
+        timeout: Seconds to wait
+    
+    Returns:
+        True if all of the turn's writes so far finished successfully
+    """
+    if turn is None:
+        turn = _current_turn.get()
+        if turn is None:
+            return True
+    
+    with turn.lock:
+        pending = turn.writes[:]
+    
+    if pending:
+        done, not_done = wait(pending, timeout=timeout)
+        if not_done:
+            logger.warning(f"{len(not_done)} background Firestore write(s) still running after {timeout}s")
+        
+        with turn.lock:
+            turn.writes = [f for f in turn.writes if f not in done]
+            if any(_write_failed(f) for f in done):
+                turn.failed = True
+        
+        if not_done:
+            return False
+    
+    return not turn.failed
+
+
+def _after_pending_writes(fn, invalidates_cache: bool = False):
+    """
+    Wrap a Firestore read/update/delete so it runs after this turn's queued creations land.
+    
+    Wrapped writes (invalidates_cache=True) also drop this turn's cached reads.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        await_pending_writes()
+        if invalidates_cache:
+            _invalidate_turn_cache()
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+get_all_shapes = _after_pending_writes(_get_all_shapes)
+update_shape_in_firestore = _after_pending_writes(_update_shape_in_firestore, invalidates_cache=True)
+update_shapes_batch_in_firestore = _after_pending_writes(_update_shapes_batch_in_firestore, invalidates_cache=True)
+delete_shape_from_firestore = _after_pending_writes(_delete_shape_from_firestore, invalidates_cache=True)
+delete_shapes_batch_from_firestore = _after_pending_writes(_delete_shapes_batch_from_firestore, invalidates_cache=True)
+
+
+def read_canvas_shapes(canvas_id: str = "main-canvas") -> List[Dict[str, Any]]:
+    """
+    Get all shapes on a canvas, reusing this turn's earlier read if there was no write since.
+    
+    Returns a new list of copied dicts, so callers may sort or mutate freely.
+    """
+    turn = _current_turn.get()
+    if turn is None:
+        return get_all_shapes(canvas_id)
+    
+    shapes = turn.shapes.get(canvas_id)
+    if shapes is None:
+        shapes = turn.shapes[canvas_id] = get_all_shapes(canvas_id)
+    return [dict(shape) for shape in shapes]
+
 
 # Color mapping for natural language to hex colors
 COLOR_MAP = {
@@ -41,20 +237,126 @@ COLOR_MAP = {
     "magenta": "#FF00FF",
 }
 
+# COLOR_MAP plus the common capitalizations, so exact matches skip lower()/strip()
+_COLOR_LOOKUP: Mapping[str, str] = MappingProxyType({
+    **{name.upper(): hex_color for name, hex_color in COLOR_MAP.items()},
+    **{name.capitalize(): hex_color for name, hex_color in COLOR_MAP.items()},
+    **COLOR_MAP,
+})
+
+# Constant fields shared by every shape of a given type. Tools copy these
+# prototypes and fill in the varying fields instead of rebuilding full literals.
+_STYLE_PROTO = {
+    "rotation": 0,
+    "stroke": "#000000",
+    "strokeWidth": 0,
+}
+
+_RECT_PROTO = {"type": "rectangle", **_STYLE_PROTO}
+
+_CIRCLE_PROTO = {"type": "circle", **_STYLE_PROTO}
+
+_VALID_SHAPES = frozenset(("rectangle", "circle"))
+
+_TEXT_PROTO = {
+    "type": "text",
+    "fontFamily": "Arial",
+    "stroke": "#000000",
+    "strokeWidth": 0,
+}
+
 
 def generate_shape_id() -> str:
-    """Generate a unique ID for a shape"""
-    return str(uuid.uuid4())
+    """Generate a unique ID for a shape (128 random bits as 32 hex chars)"""
+    return secrets.token_hex(16)
+
+
+def generate_shape_ids(count: int) -> List[str]:
+    """Generate unique IDs for a batch of shapes from a single urandom read"""
+    if count <= 0:
+        return []
+    raw = os.urandom(16 * count).hex()
+    return [raw[i:i + 32] for i in range(0, 32 * count, 32)]
 
 
 def normalize_color(color: str) -> str:
     """Convert color name to hex, or return hex if already provided"""
-    color_lower = color.lower().strip()
-    return COLOR_MAP.get(color_lower, color)
+    # Canonical "#RRGGBB" is the common case; return it without touching the cache
+    if len(color) == 7 and color[0] == "#":
+        return color
+    return _normalize_color_slow(color)
+
+
+@lru_cache(maxsize=256)
+def _normalize_color_slow(color: str) -> str:
+    """Color names and non-canonical hex forms (cached per input)"""
+    if color[:1] == "#":
+        return color
+    hex_color = _COLOR_LOOKUP.get(color)
+    if hex_color is not None:
+        return hex_color
+    return COLOR_MAP.get(color.lower().strip(), color)
+
+
+def create_shapes_batch_trusted(
+    shapes: List[Dict[str, Any]],
+    canvas_id: str = "main-canvas",
+    sync: bool = False
+) -> bool:
+    """
+    Write shapes built internally by the tools straight to Firestore.
+    
+    Skips the per-shape validation done by the create_shapes_batch tool, so callers
+    must guarantee every shape already has an id, a type and a hex fill.
+    The write runs in the background unless sync=True.
+    """
+    return submit_write(
+        create_shapes_batch_in_firestore,
+        shapes=shapes,
+        canvas_id=canvas_id,
+        session_id="ai-agent",
+        sync=sync
+    )
+
+
+def create_shape_columns(
+    proto: Dict[str, Any],
+    columns: Dict[str, List[Any]],
+    canvas_id: str = "main-canvas",
+    sync: bool = False
+) -> bool:
+    """
+    Shared writer for the bulk generators (grid, random shapes).
+    
+    Args:
+        proto: Fields common to every generated shape
+        columns: Parallel per-shape value lists, including 'id'
+        canvas_id: Canvas identifier
+        sync: Wait for the commit instead of writing in the background
+    """
+    return submit_write(
+        create_shapes_batch_columnar_in_firestore,
+        proto=proto,
+        columns=columns,
+        canvas_id=canvas_id,
+        session_id="ai-agent",
+        sync=sync
+    )
 
 
 # ==================== READ OPERATIONS ====================
 
+def _get_canvas_shapes_impl(canvas_id: str = "main-canvas") -> List[Dict[str, Any]]:
+    """Body of the get_canvas_shapes tool"""
+    try:
+        shapes = read_canvas_shapes(canvas_id)
+        simplified_shapes = shapes_to_simple_format(shapes)
+        return simplified_shapes
+    except Exception as e:
+        print(f"Error fetching canvas shapes: {e}")
+        return []
+
+
 @tool
 def get_canvas_shapes(canvas_id: str = "main-canvas") -> List[Dict[str, Any]]:
     """
@@ -67,19 +369,12 @@ def get_canvas_shapes(canvas_id: str = "main-canvas") -> List[Dict[str, Any]]:
     Returns:
         List of shapes with: id, type, x, y, width, height, fill, rotation, text (for text type), fontSize (for text type)
     """
-    try:
-        shapes = get_all_shapes(canvas_id)
-        simplified_shapes = shapes_to_simple_format(shapes)
-        return simplified_shapes
-    except Exception as e:
-        print(f"Error fetching canvas shapes: {e}")
-        return []
+    return _get_canvas_shapes_impl(canvas_id=canvas_id)
 
 
 # ==================== CREATE OPERATIONS ====================
 
-@tool
-def create_shape(
+def _create_shape_impl(
     shape_type: str,
     x: float,
     y: float,
@@ -89,44 +384,31 @@ def create_shape(
     rotation: float = 0,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
-    """
-    Create a rectangle or circle on the canvas.
-    
-    Args:
-        shape_type: "rectangle" or "circle"
-        x: X position (top-left for rectangles, center for circles - Konva.js convention)
-        y: Y position (top-left for rectangles, center for circles - Konva.js convention)
-        width: Width in pixels (default: 100)
-        height: Height in pixels (default: 100, circle uses width as diameter)
-        color: Color name or hex code (default: "blue")
-        rotation: Rotation angle in degrees (default: 0)
-        canvas_id: Canvas identifier (default: "main-canvas")
-    
-    Returns:
-        Dictionary with success status and message
-    """
+    """Body of the create_shape tool"""
     shape_type_lower = shape_type.lower()
     
-    if shape_type_lower not in ["rectangle", "circle"]:
+    if shape_type_lower not in _VALID_SHAPES:
         shape_type_lower = "rectangle"
     
     fill_color = normalize_color(color)
     
-    shape = {
-        "id": generate_shape_id(),
-        "type": shape_type_lower,
-        "x": float(x),
-        "y": float(y),
-        "width": float(width),
-        "height": float(height) if shape_type_lower == "rectangle" else float(width),
-        "fill": fill_color,
-        "rotation": float(rotation),
-        "stroke": "#000000",
-        "strokeWidth": 0,
-    }
+    # Coerce once up front; the dict below only reuses the bound locals
+    x = float(x)
+    y = float(y)
+    width = float(width)
+    
+    shape = (_RECT_PROTO if shape_type_lower == "rectangle" else _CIRCLE_PROTO).copy()
+    shape["id"] = generate_shape_id()
+    shape["x"] = x
+    shape["y"] = y
+    shape["width"] = width
+    shape["height"] = float(height) if shape_type_lower == "rectangle" else width
+    shape["fill"] = fill_color
+    shape["rotation"] = float(rotation)
     
     try:
-        success = create_shape_in_firestore(
+        success = submit_write(
+            create_shape_in_firestore,
             shape=shape,
             canvas_id=canvas_id,
             session_id="ai-agent"
@@ -151,49 +433,75 @@ def create_shape(
 
 
 @tool
-def create_text(
-    text: str,
+def create_shape(
+    shape_type: str,
     x: float,
     y: float,
-    font_size: int = 16,
-    color: str = "black",
-    font_family: str = "Arial",
+    width: float = 100,
+    height: float = 100,
+    color: str = "blue",
+    rotation: float = 0,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Create a text element on the canvas.
+    Create a rectangle or circle on the canvas.
     
     Args:
-        text: Text content to display
-        x: X position
-        y: Y position
-        font_size: Font size in pixels (default: 16)
-        color: Color name or hex code (default: "black")
-        font_family: Font family (default: "Arial")
+        shape_type: "rectangle" or "circle"
+        x: X position (top-left for rectangles, center for circles - Konva.js convention)
+        y: Y position (top-left for rectangles, center for circles - Konva.js convention)
+        width: Width in pixels (default: 100)
+        height: Height in pixels (default: 100, circle uses width as diameter)
+        color: Color name or hex code (default: "blue")
+        rotation: Rotation angle in degrees (default: 0)
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _create_shape_impl(
+        shape_type=shape_type,
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        color=color,
+        rotation=rotation,
+        canvas_id=canvas_id
+    )
+
+
+def _create_text_impl(
+    text: str,
+    x: float,
+    y: float,
+    font_size: int = 16,
+    color: str = "black",
+    font_family: str = "Arial",
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the create_text tool"""
     fill_color = normalize_color(color)
     
-    text_shape = {
-        "id": generate_shape_id(),
-        "type": "text",
-        "x": float(x),
-        "y": float(y),
-        "text": str(text),
-        "fontSize": int(font_size),
-        "fontFamily": font_family,
-        "fill": fill_color,
-        "width": len(text) * font_size * 0.6,
-        "height": font_size * 1.2,
-        "stroke": "#000000",
-        "strokeWidth": 0,
-    }
+    # Coerce once up front; the dict below only reuses the bound locals
+    x = float(x)
+    y = float(y)
+    font_size = int(font_size)
+    
+    text_shape = _TEXT_PROTO.copy()
+    text_shape["id"] = generate_shape_id()
+    text_shape["x"] = x
+    text_shape["y"] = y
+    text_shape["text"] = str(text)
+    text_shape["fontSize"] = font_size
+    text_shape["fontFamily"] = font_family
+    text_shape["fill"] = fill_color
+    text_shape["width"] = len(text) * font_size * 0.6
+    text_shape["height"] = font_size * 1.2
     
     try:
-        success = create_shape_in_firestore(
+        success = submit_write(
+            create_shape_in_firestore,
             shape=text_shape,
             canvas_id=canvas_id,
             session_id="ai-agent"
@@ -217,29 +525,51 @@ def create_text(
         }
 
 
-# ==================== MANIPULATION OPERATIONS ====================
-
 @tool
-def move_shape(
-    shape_id: str,
-    new_x: float,
-    new_y: float,
+def create_text(
+    text: str,
+    x: float,
+    y: float,
+    font_size: int = 16,
+    color: str = "black",
+    font_family: str = "Arial",
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Move a SINGLE shape to a new position. FOR 3+ SHAPES, USE move_random_shapes INSTEAD!
-    
-    WARNING: Do NOT call this function multiple times! For moving 3+ shapes, you MUST use move_random_shapes.
+    Create a text element on the canvas.
     
     Args:
-        shape_id: Unique ID of the shape (from get_canvas_shapes)
-        new_x: New X position (top-left for rectangles, center for circles - Konva.js convention)
-        new_y: New Y position (top-left for rectangles, center for circles - Konva.js convention)
+        text: Text content to display
+        x: X position
+        y: Y position
+        font_size: Font size in pixels (default: 16)
+        color: Color name or hex code (default: "black")
+        font_family: Font family (default: "Arial")
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _create_text_impl(
+        text=text,
+        x=x,
+        y=y,
+        font_size=font_size,
+        color=color,
+        font_family=font_family,
+        canvas_id=canvas_id
+    )
+
+
+# ==================== MANIPULATION OPERATIONS ====================
+
+def _move_shape_impl(
+    shape_id: str,
+    new_x: float,
+    new_y: float,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the move_shape tool"""
     try:
         success = update_shape_in_firestore(
             shape_id=shape_id,
@@ -274,26 +604,36 @@ def move_shape(
 
 
 @tool
-def resize_shape(
+def move_shape(
     shape_id: str,
-    new_width: float,
-    new_height: Optional[float] = None,
+    new_x: float,
+    new_y: float,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Resize a SINGLE shape. FOR 3+ SHAPES, USE update_shapes_batch INSTEAD!
+    Move a SINGLE shape to a new position. FOR 3+ SHAPES, USE move_random_shapes INSTEAD!
     
-    WARNING: Do NOT call this function multiple times! For resizing 3+ shapes, use update_shapes_batch.
+    WARNING: Do NOT call this function multiple times! For moving 3+ shapes, you MUST use move_random_shapes.
     
     Args:
         shape_id: Unique ID of the shape (from get_canvas_shapes)
-        new_width: New width in pixels
-        new_height: New height in pixels (optional, defaults to new_width)
+        new_x: New X position (top-left for rectangles, center for circles - Konva.js convention)
+        new_y: New Y position (top-left for rectangles, center for circles - Konva.js convention)
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _move_shape_impl(shape_id=shape_id, new_x=new_x, new_y=new_y, canvas_id=canvas_id)
+
+
+def _resize_shape_impl(
+    shape_id: str,
+    new_width: float,
+    new_height: Optional[float] = None,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the resize_shape tool"""
     if new_height is None:
         new_height = new_width
     
@@ -331,22 +671,40 @@ def resize_shape(
 
 
 @tool
-def rotate_shape(
+def resize_shape(
     shape_id: str,
-    angle: float,
+    new_width: float,
+    new_height: Optional[float] = None,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Rotate a shape. Call get_canvas_shapes() first to find the shape ID.
+    Resize a SINGLE shape. FOR 3+ SHAPES, USE update_shapes_batch INSTEAD!
+    
+    WARNING: Do NOT call this function multiple times! For resizing 3+ shapes, use update_shapes_batch.
     
     Args:
         shape_id: Unique ID of the shape (from get_canvas_shapes)
-        angle: Rotation angle in degrees (0-360, positive = clockwise)
+        new_width: New width in pixels
+        new_height: New height in pixels (optional, defaults to new_width)
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _resize_shape_impl(
+        shape_id=shape_id,
+        new_width=new_width,
+        new_height=new_height,
+        canvas_id=canvas_id
+    )
+
+
+def _rotate_shape_impl(
+    shape_id: str,
+    angle: float,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the rotate_shape tool"""
     try:
         normalized_angle = float(angle) % 360
         
@@ -379,24 +737,31 @@ def rotate_shape(
 
 
 @tool
-def change_shape_color(
+def rotate_shape(
     shape_id: str,
-    new_color: str,
+    angle: float,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Change the color of a SINGLE shape. FOR 3+ SHAPES, USE update_shapes_batch INSTEAD!
-    
-    WARNING: Do NOT call this function multiple times! For changing color of 3+ shapes, use update_shapes_batch.
+    Rotate a shape. Call get_canvas_shapes() first to find the shape ID.
     
     Args:
         shape_id: Unique ID of the shape (from get_canvas_shapes)
-        new_color: Color name or hex code
+        angle: Rotation angle in degrees (0-360, positive = clockwise)
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _rotate_shape_impl(shape_id=shape_id, angle=angle, canvas_id=canvas_id)
+
+
+def _change_shape_color_impl(
+    shape_id: str,
+    new_color: str,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the change_shape_color tool"""
     fill_color = normalize_color(new_color)
     
     try:
@@ -429,38 +794,36 @@ def change_shape_color(
 
 
 @tool
-def arrange_shapes_horizontal(
-    spacing: float = 0,
-    y_position: Optional[float] = None,
+def change_shape_color(
+    shape_id: str,
+    new_color: str,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Arrange all shapes in a horizontal row (left to right).
-    
-    Each shape starts where the previous one ends, plus optional spacing.
+    Change the color of a SINGLE shape. FOR 3+ SHAPES, USE update_shapes_batch INSTEAD!
     
-    **Use when:**
-    - User says "arrange in a row", "line up horizontally", "put in a horizontal line"
-    - User wants shapes organized left to right
+    WARNING: Do NOT call this function multiple times! For changing color of 3+ shapes, use update_shapes_batch.
     
     Args:
-        spacing: Gap between shapes in pixels (default: 0 = no gap, shapes touching)
-        y_position: Y coordinate for the row (optional, uses average if not provided)
-        canvas_id: ID of the canvas (default: "main-canvas")
+        shape_id: Unique ID of the shape (from get_canvas_shapes)
+        new_color: Color name or hex code
+        canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
-    
-    Example:
-        User: "arrange all shapes in a horizontal row"
-        → arrange_shapes_horizontal(spacing=0)
-        
-        User: "arrange shapes in a row with 20px spacing"
-        → arrange_shapes_horizontal(spacing=20)
     """
+    return _change_shape_color_impl(shape_id=shape_id, new_color=new_color, canvas_id=canvas_id)
+
+
+def _arrange_shapes_horizontal_impl(
+    spacing: float = 0,
+    y_position: Optional[float] = None,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the arrange_shapes_horizontal tool"""
     try:
         # Get all shapes
-        shapes = get_all_shapes(canvas_id)
+        shapes = read_canvas_shapes(canvas_id)
         
         if len(shapes) == 0:
             return {
@@ -506,7 +869,7 @@ def arrange_shapes_horizontal(
                 "success": True,
                 "message": f"Arranged {len(shapes)} shapes in horizontal row",
                 "shape_count": len(shapes),
-                "shapes": shapes_sorted  # Return updated shapes
+                "shapes": shapes_to_simple_format(shapes_sorted)  # Return updated shapes (JSON-safe fields only)
             }
         else:
             return {
@@ -522,38 +885,47 @@ def arrange_shapes_horizontal(
 
 
 @tool
-def arrange_shapes_vertical(
+def arrange_shapes_horizontal(
     spacing: float = 0,
-    x_position: Optional[float] = None,
+    y_position: Optional[float] = None,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Arrange all shapes in a vertical column (top to bottom).
+    Arrange all shapes in a horizontal row (left to right).
     
     Each shape starts where the previous one ends, plus optional spacing.
     
     **Use when:**
-    - User says "arrange in a column", "stack vertically", "put in a vertical line"
-    - User wants shapes organized top to bottom
+    - User says "arrange in a row", "line up horizontally", "put in a horizontal line"
+    - User wants shapes organized left to right
     
     Args:
         spacing: Gap between shapes in pixels (default: 0 = no gap, shapes touching)
-        x_position: X coordinate for the column (optional, uses average if not provided)
+        y_position: Y coordinate for the row (optional, uses average if not provided)
         canvas_id: ID of the canvas (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     
     Example:
-        User: "arrange all shapes in a vertical column"
-        → arrange_shapes_vertical(spacing=0)
+        User: "arrange all shapes in a horizontal row"
+        → arrange_shapes_horizontal(spacing=0)
         
-        User: "arrange shapes vertically with 20px spacing"
-        → arrange_shapes_vertical(spacing=20)
+        User: "arrange shapes in a row with 20px spacing"
+        → arrange_shapes_horizontal(spacing=20)
     """
+    return _arrange_shapes_horizontal_impl(spacing=spacing, y_position=y_position, canvas_id=canvas_id)
+
+
+def _arrange_shapes_vertical_impl(
+    spacing: float = 0,
+    x_position: Optional[float] = None,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the arrange_shapes_vertical tool"""
     try:
         # Get all shapes
-        shapes = get_all_shapes(canvas_id)
+        shapes = read_canvas_shapes(canvas_id)
         
         if len(shapes) == 0:
             return {
@@ -599,7 +971,7 @@ def arrange_shapes_vertical(
                 "success": True,
                 "message": f"Arranged {len(shapes)} shapes in vertical column",
                 "shape_count": len(shapes),
-                "shapes": shapes_sorted  # Return updated shapes
+                "shapes": shapes_to_simple_format(shapes_sorted)  # Return updated shapes (JSON-safe fields only)
             }
         else:
             return {
@@ -615,34 +987,45 @@ def arrange_shapes_vertical(
 
 
 @tool
-def delete_all_shapes(
+def arrange_shapes_vertical(
+    spacing: float = 0,
+    x_position: Optional[float] = None,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Delete ALL shapes from the canvas in one fast operation.
+    Arrange all shapes in a vertical column (top to bottom).
     
-    This is MUCH FASTER than getting all shapes and then calling delete_shapes_batch,
-    because it does everything in one operation.
+    Each shape starts where the previous one ends, plus optional spacing.
     
     **Use when:**
-    - User says "delete all", "clear canvas", "remove everything", "delete all shapes"
-    - User wants to start fresh
-    
-    **WARNING:** This deletes EVERYTHING. Cannot be undone.
+    - User says "arrange in a column", "stack vertically", "put in a vertical line"
+    - User wants shapes organized top to bottom
     
     Args:
+        spacing: Gap between shapes in pixels (default: 0 = no gap, shapes touching)
+        x_position: X coordinate for the column (optional, uses average if not provided)
         canvas_id: ID of the canvas (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     
     Example:
-        User: "delete all shapes"
-        → delete_all_shapes()
+        User: "arrange all shapes in a vertical column"
+        → arrange_shapes_vertical(spacing=0)
+        
+        User: "arrange shapes vertically with 20px spacing"
+        → arrange_shapes_vertical(spacing=20)
     """
+    return _arrange_shapes_vertical_impl(spacing=spacing, x_position=x_position, canvas_id=canvas_id)
+
+
+def _delete_all_shapes_impl(
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the delete_all_shapes tool"""
     try:
         # Get all shapes
-        shapes = get_all_shapes(canvas_id)
+        shapes = read_canvas_shapes(canvas_id)
         
         if len(shapes) == 0:
             return {
@@ -680,20 +1063,39 @@ def delete_all_shapes(
 
 
 @tool
-def delete_shape_by_id(
-    shape_id: str,
+def delete_all_shapes(
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Delete a shape from the canvas. Call get_canvas_shapes() first to find the shape ID.
+    Delete ALL shapes from the canvas in one fast operation.
+    
+    This is MUCH FASTER than getting all shapes and then calling delete_shapes_batch,
+    because it does everything in one operation.
+    
+    **Use when:**
+    - User says "delete all", "clear canvas", "remove everything", "delete all shapes"
+    - User wants to start fresh
+    
+    **WARNING:** This deletes EVERYTHING. Cannot be undone.
     
     Args:
-        shape_id: Unique ID of the shape to delete
-        canvas_id: Canvas identifier (default: "main-canvas")
+        canvas_id: ID of the canvas (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
+    
+    Example:
+        User: "delete all shapes"
+        → delete_all_shapes()
     """
+    return _delete_all_shapes_impl(canvas_id=canvas_id)
+
+
+def _delete_shape_by_id_impl(
+    shape_id: str,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the delete_shape_by_id tool"""
     try:
         success = delete_shape_from_firestore(
             shape_id=shape_id,
@@ -721,38 +1123,31 @@ def delete_shape_by_id(
 
 
 @tool
-def move_random_shapes(
-    count: int,
-    offset_x: float,
-    offset_y: float,
+def delete_shape_by_id(
+    shape_id: str,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Move a specific number of RANDOMLY SELECTED shapes by an offset. FAST! No shape IDs needed!
-    
-    This tool automatically selects random shapes from the canvas and moves them.
-    Perfect for commands like "move 10 shapes right" where specific shapes don't matter.
+    Delete a shape from the canvas. Call get_canvas_shapes() first to find the shape ID.
     
     Args:
-        count: Number of shapes to move (e.g., 10, 100, 500)
-        offset_x: Amount to move horizontally (positive = right, negative = left)
-        offset_y: Amount to move vertically (positive = down, negative = up)
+        shape_id: Unique ID of the shape to delete
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
-        
-    Examples:
-        - "move 10 shapes 50 pixels to the right" → move_random_shapes(count=10, offset_x=50, offset_y=0)
-        - "shift 100 shapes down" → move_random_shapes(count=100, offset_x=0, offset_y=100)
-        - "move all shapes left" → get_canvas_shapes() to count, then move_random_shapes(count=total, offset_x=-50, offset_y=0)
-    
-    NOTE: Shapes are selected randomly. For moving ALL shapes, pass count equal to total shape count.
     """
+    return _delete_shape_by_id_impl(shape_id=shape_id, canvas_id=canvas_id)
+
+
+def _move_random_shapes_impl(
+    count: int,
+    offset_x: float,
+    offset_y: float,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the move_random_shapes tool"""
     try:
-        import logging
-        import random
-        logger = logging.getLogger("tools")
         logger.info(f"🔄 move_random_shapes called: count={count}, offset_x={offset_x}, offset_y={offset_y}")
         
         if count <= 0:
@@ -762,7 +1157,7 @@ def move_random_shapes(
             }
         
         # Get all shapes
-        all_shapes = get_all_shapes(canvas_id=canvas_id)
+        all_shapes = read_canvas_shapes(canvas_id)
         
         if not all_shapes:
             return {
@@ -810,40 +1205,130 @@ def move_random_shapes(
         }
 
 
-# ==================== COMPLEX CREATE OPERATIONS ====================
-
 @tool
-def create_random_shapes_simple(
+def move_random_shapes(
     count: int,
-    shape_type: str = "rectangle",
+    offset_x: float,
+    offset_y: float,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Create multiple random shapes efficiently (optimized for large quantities).
+    Move a specific number of RANDOMLY SELECTED shapes by an offset. FAST! No shape IDs needed!
     
-    This tool is MUCH FASTER than create_shapes_batch for creating many shapes
-    because it generates shapes in Python instead of requiring the LLM to generate
-    a large JSON array.
+    This tool automatically selects random shapes from the canvas and moves them.
+    Perfect for commands like "move 10 shapes right" where specific shapes don't matter.
     
-    **Use this tool when:**
-    - User asks for 50+ shapes (e.g., "create 500 squares", "create 500 rectangles")
-    - User wants random positions and colors
-    - Speed is important
+    Args:
+        count: Number of shapes to move (e.g., 10, 100, 500)
+        offset_x: Amount to move horizontally (positive = right, negative = left)
+        offset_y: Amount to move vertically (positive = down, negative = up)
+        canvas_id: Canvas identifier (default: "main-canvas")
+    
+    Returns:
+        Dictionary with success status and message
+        
+    Examples:
+        - "move 10 shapes 50 pixels to the right" → move_random_shapes(count=10, offset_x=50, offset_y=0)
+        - "shift 100 shapes down" → move_random_shapes(count=100, offset_x=0, offset_y=100)
+        - "move all shapes left" → get_canvas_shapes() to count, then move_random_shapes(count=total, offset_x=-50, offset_y=0)
+    
+    NOTE: Shapes are selected randomly. For moving ALL shapes, pass count equal to total shape count.
+    """
+    return _move_random_shapes_impl(count=count, offset_x=offset_x, offset_y=offset_y, canvas_id=canvas_id)
+
+
+def _move_shapes_impl(
+    shape_ids: List[str],
+    offset_x: float,
+    offset_y: float,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the move_shapes tool"""
+    try:
+        if not shape_ids:
+            return {
+                "success": False,
+                "message": "No shape IDs provided"
+            }
+        
+        wanted = set(shape_ids)
+        shapes_to_move = [s for s in read_canvas_shapes(canvas_id) if s['id'] in wanted]
+        
+        if not shapes_to_move:
+            return {
+                "success": False,
+                "message": "None of the given shapes exist on the canvas"
+            }
+        
+        offset_x = float(offset_x)
+        offset_y = float(offset_y)
+        updates = [
+            {
+                'shape_id': shape['id'],
+                'x': float(shape.get('x', 0)) + offset_x,
+                'y': float(shape.get('y', 0)) + offset_y
+            }
+            for shape in shapes_to_move
+        ]
+        
+        # One batch commit for all shapes (one round-trip instead of N)
+        success = update_shapes_batch_in_firestore(
+            updates=updates,
+            canvas_id=canvas_id,
+            session_id="ai-agent"
+        )
+        
+        if success:
+            return {
+                "success": True,
+                "message": f"Moved {len(updates)} shapes by offset ({offset_x}, {offset_y})",
+                "shape_count": len(updates)
+            }
+        else:
+            return {
+                "success": False,
+                "message": "Failed to move shapes"
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Error moving shapes: {str(e)}"
+        }
+
+
+@tool
+def move_shapes(
+    shape_ids: List[str],
+    offset_x: float,
+    offset_y: float,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """
+    Move SPECIFIC shapes by the same offset in ONE call. Use for 3+ shapes instead of repeated move_shape!
     
     Args:
-        count: Number of shapes to create (can be 100, 500, 1000+)
-        shape_type: Type of shapes - "rectangle", "square", "circle", or "mixed" (default: "rectangle")
-        canvas_id: ID of the canvas (default: "main-canvas")
+        shape_ids: IDs of the shapes to move (from get_canvas_shapes)
+        offset_x: Amount to move horizontally (positive = right, negative = left)
+        offset_y: Amount to move vertically (positive = down, negative = up)
+        canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     
-    Examples:
-        create_random_shapes_simple(count=500, shape_type="square")      # All squares (width = height)
-        create_random_shapes_simple(count=500, shape_type="rectangle")   # All rectangles (width != height)
-        create_random_shapes_simple(count=100, shape_type="circle")
-        create_random_shapes_simple(count=1000, shape_type="mixed")      # Mix of all types
+    Example:
+        "move all blue rectangles right" → get_canvas_shapes() → filter → move_shapes(shape_ids=[...], offset_x=100, offset_y=0)
     """
+    return _move_shapes_impl(shape_ids=shape_ids, offset_x=offset_x, offset_y=offset_y, canvas_id=canvas_id)
+
+
+# ==================== COMPLEX CREATE OPERATIONS ====================
+
+def _create_random_shapes_simple_impl(
+    count: int,
+    shape_type: str = "rectangle",
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the create_random_shapes_simple tool"""
     import random
     
     shape_type = shape_type.lower()
@@ -856,7 +1341,14 @@ def create_random_shapes_simple(
         "#FFA500", "#800080", "#FFC0CB", "#A52A2A", "#808080", "#000080"
     ]
     
-    shapes = []
+    count = max(count, 0)
+    types = [None] * count
+    xs = [0.0] * count
+    ys = [0.0] * count
+    widths = [0.0] * count
+    heights = [0.0] * count
+    fills = [None] * count
+    
     for i in range(count):
         # Determine shape type (for mixed mode)
         if shape_type == "mixed":
@@ -865,51 +1357,41 @@ def create_random_shapes_simple(
             current_type = shape_type
         
         # Random position (spread across canvas, avoiding edges)
-        x = random.randint(50, 2950)
-        y = random.randint(50, 2950)
+        xs[i] = float(random.randint(50, 2950))
+        ys[i] = float(random.randint(50, 2950))
         
         # Random size - handle squares vs rectangles vs circles
+        # (type is "rectangle" or "circle" - a square is just a rectangle with equal sides)
         if current_type == "square":
             # Square: width = height (one random side, copied to both dimensions)
-            size = random.randint(30, 150)
-            width = size
-            height = size
-            render_type = "rectangle"  # Konva.js renders squares as rectangles with equal dimensions
+            widths[i] = heights[i] = float(random.randint(30, 150))
+            types[i] = "rectangle"  # Konva.js renders squares as rectangles with equal dimensions
         elif current_type == "circle":
             # Circle: width = diameter, height = width
-            width = random.randint(30, 150)
-            height = width
-            render_type = "circle"
+            widths[i] = heights[i] = float(random.randint(30, 150))
+            types[i] = "circle"
         else:  # rectangle
             # Rectangle: width and height are independently random
-            width = random.randint(30, 150)
-            height = random.randint(30, 150)
-            render_type = "rectangle"
+            widths[i] = float(random.randint(30, 150))
+            heights[i] = float(random.randint(30, 150))
+            types[i] = "rectangle"
         
         # Random color
-        color = random.choice(colors)
-        
-        shape = {
-            "id": f"{generate_shape_id()}-{i}",
-            "type": render_type,  # "rectangle" or "circle" (not "square" - that's just a rectangle with equal sides)
-            "x": float(x),
-            "y": float(y),
-            "width": float(width),
-            "height": float(height),
-            "fill": color,
-            "rotation": 0,
-            "stroke": "#000000",
-            "strokeWidth": 0,
-        }
-        shapes.append(shape)
+        fills[i] = random.choice(colors)
+    
+    columns = {
+        "id": [f"{shape_id}-{i}" for i, shape_id in enumerate(generate_shape_ids(count))],
+        "type": types,
+        "x": xs,
+        "y": ys,
+        "width": widths,
+        "height": heights,
+        "fill": fills,
+    }
     
-    # Use existing batch create function
+    # Same columnar writer as create_grid
     try:
-        success = create_shapes_batch_in_firestore(
-            shapes=shapes,
-            canvas_id=canvas_id,
-            session_id="ai-agent"
-        )
+        success = create_shape_columns(_STYLE_PROTO, columns, canvas_id=canvas_id)
         
         if success:
             return {
@@ -930,7 +1412,41 @@ def create_random_shapes_simple(
 
 
 @tool
-def create_grid(
+def create_random_shapes_simple(
+    count: int,
+    shape_type: str = "rectangle",
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """
+    Create multiple random shapes efficiently (optimized for large quantities).
+    
+    This tool is MUCH FASTER than create_shapes_batch for creating many shapes
+    because it generates shapes in Python instead of requiring the LLM to generate
+    a large JSON array.
+    
+    **Use this tool when:**
+    - User asks for 50+ shapes (e.g., "create 500 squares", "create 500 rectangles")
+    - User wants random positions and colors
+    - Speed is important
+    
+    Args:
+        count: Number of shapes to create (can be 100, 500, 1000+)
+        shape_type: Type of shapes - "rectangle", "square", "circle", or "mixed" (default: "rectangle")
+        canvas_id: ID of the canvas (default: "main-canvas")
+    
+    Returns:
+        Dictionary with success status and message
+    
+    Examples:
+        create_random_shapes_simple(count=500, shape_type="square")      # All squares (width = height)
+        create_random_shapes_simple(count=500, shape_type="rectangle")   # All rectangles (width != height)
+        create_random_shapes_simple(count=100, shape_type="circle")
+        create_random_shapes_simple(count=1000, shape_type="mixed")      # Mix of all types
+    """
+    return _create_random_shapes_simple_impl(count=count, shape_type=shape_type, canvas_id=canvas_id)
+
+
+def _create_grid_impl(
     rows: int,
     cols: int,
     cell_width: float = 80,
@@ -941,57 +1457,54 @@ def create_grid(
     color: str = "blue",
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
-    """
-    Create a grid of rectangles on the canvas.
+    """Body of the create_grid tool"""
+    # Negative sizes mean an empty grid (their product would not)
+    rows = max(0, rows)
+    cols = max(0, cols)
+    count = rows * cols
+    if count == 0:
+        return {
+            "success": True,
+            "message": f"Created {rows}x{cols} grid with 0 rectangles",
+            "shape_count": 0
+        }
     
-    Args:
-        rows: Number of rows
-        cols: Number of columns
-        cell_width: Width of each cell (default: 80)
-        cell_height: Height of each cell (default: 80)
-        start_x: Starting X position (default: 100)
-        start_y: Starting Y position (default: 100)
-        spacing: Space between cells (default: 20)
-        color: Color name or hex code (default: "blue")
-        canvas_id: Canvas identifier (default: "main-canvas")
+    fill_color = normalize_color(color)  # Once per grid, not per cell
     
-    Returns:
-        Dictionary with success status and message
-    """
-    shapes = []
-    fill_color = normalize_color(color)
+    # Constant fields go in the prototype; only id/x/y vary per cell
+    proto = _RECT_PROTO.copy()
+    proto["width"] = float(cell_width)
+    proto["height"] = float(cell_height)
+    proto["fill"] = fill_color
     
-    for row in range(rows):
-        for col in range(cols):
-            x = start_x + col * (cell_width + spacing)
-            y = start_y + row * (cell_height + spacing)
-            
-            shape = {
-                "id": generate_shape_id(),
-                "type": "rectangle",
-                "x": float(x),
-                "y": float(y),
-                "width": float(cell_width),
-                "height": float(cell_height),
-                "fill": fill_color,
-                "rotation": 0,
-                "stroke": "#000000",
-                "strokeWidth": 0,
-            }
-            shapes.append(shape)
+    # Cast once; everything derived from these is already a float
+    x0 = float(start_x)
+    y0 = float(start_y)
+    step_x = float(cell_width + spacing)
+    step_y = float(cell_height + spacing)
+    
+    # Compute each column's x and each row's y once (rows + cols multiplies),
+    # then expand them row-major into the per-cell coordinate columns
+    col_xs = [x0 + col * step_x for col in range(cols)]
+    row_ys = [y0 + row * step_y for row in range(rows)]
+    
+    xs = col_xs * rows
+    ys = [y for y in row_ys for _ in range(cols)]
+    
+    columns = {
+        "id": generate_shape_ids(count),
+        "x": xs,
+        "y": ys,
+    }
     
     try:
-        success = create_shapes_batch_in_firestore(
-            shapes=shapes,
-            canvas_id=canvas_id,
-            session_id="ai-agent"
-        )
+        success = create_shape_columns(proto, columns, canvas_id=canvas_id)
         
         if success:
             return {
                 "success": True,
-                "message": f"Created {rows}x{cols} grid with {len(shapes)} rectangles",
-                "shape_count": len(shapes)
+                "message": f"Created {rows}x{cols} grid with {count} rectangles",
+                "shape_count": count
             }
         else:
             return {
@@ -1006,140 +1519,88 @@ def create_grid(
 
 
 @tool
-def create_form(
-    form_type: str = "login",
-    x: float = 200,
-    y: float = 150,
+def create_grid(
+    rows: int,
+    cols: int,
+    cell_width: float = 80,
+    cell_height: float = 80,
+    start_x: float = 100,
+    start_y: float = 100,
+    spacing: float = 20,
+    color: str = "blue",
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Create a form with multiple elements (title, labels, fields, button).
+    Create a grid of rectangles on the canvas.
     
     Args:
-        form_type: Type of form ("login", "signup", or "contact") - default: "login"
-        x: Starting X position (default: 200)
-        y: Starting Y position (default: 150)
+        rows: Number of rows
+        cols: Number of columns
+        cell_width: Width of each cell (default: 80)
+        cell_height: Height of each cell (default: 80)
+        start_x: Starting X position (default: 100)
+        start_y: Starting Y position (default: 100)
+        spacing: Space between cells (default: 20)
+        color: Color name or hex code (default: "blue")
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _create_grid_impl(
+        rows=rows,
+        cols=cols,
+        cell_width=cell_width,
+        cell_height=cell_height,
+        start_x=start_x,
+        start_y=start_y,
+        spacing=spacing,
+        color=color,
+        canvas_id=canvas_id
+    )
+
+
+# Login form elements as (template, dx, dy), resolved once at import.
+# create_form only adds the form's origin and a fresh ID to each template.
+_LOGIN_LAYOUT = (
+    # Title
+    ({**_TEXT_PROTO, "text": "Login", "fontSize": 24, "fill": "#000000", "width": 100, "height": 30}, 0, 0),
+    # Username label
+    ({**_TEXT_PROTO, "text": "Username:", "fontSize": 14, "fill": "#333333", "width": 100, "height": 20}, 0, 50),
+    # Username field
+    ({**_RECT_PROTO, "width": 250, "height": 40, "fill": "#FFFFFF"}, 0, 75),
+    # Password label
+    ({**_TEXT_PROTO, "text": "Password:", "fontSize": 14, "fill": "#333333", "width": 100, "height": 20}, 0, 130),
+    # Password field
+    ({**_RECT_PROTO, "width": 250, "height": 40, "fill": "#FFFFFF"}, 0, 155),
+    # Submit button
+    ({**_RECT_PROTO, "width": 250, "height": 45, "fill": "#007BFF"}, 0, 215),
+    # Button text
+    ({**_TEXT_PROTO, "text": "Login", "fontSize": 16, "fill": "#FFFFFF", "width": 80, "height": 20}, 85, 227),
+)
+
+
+def _create_form_impl(
+    form_type: str = "login",
+    x: float = 200,
+    y: float = 150,
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the create_form tool"""
+    x = float(x)
+    y = float(y)
     shapes = []
     form_type_lower = form_type.lower()
     
     if form_type_lower == "login":
-        # Title
-        shapes.append({
-            "id": generate_shape_id(),
-            "type": "text",
-            "x": float(x),
-            "y": float(y),
-            "text": "Login",
-            "fontSize": 24,
-            "fontFamily": "Arial",
-            "fill": "#000000",
-            "width": 100,
-            "height": 30,
-            "stroke": "#000000",
-            "strokeWidth": 0,
-        })
-        
-        # Username label
-        shapes.append({
-            "id": generate_shape_id(),
-            "type": "text",
-            "x": float(x),
-            "y": float(y + 50),
-            "text": "Username:",
-            "fontSize": 14,
-            "fontFamily": "Arial",
-            "fill": "#333333",
-            "width": 100,
-            "height": 20,
-            "stroke": "#000000",
-            "strokeWidth": 0,
-        })
-        
-        # Username field
-        shapes.append({
-            "id": generate_shape_id(),
-            "type": "rectangle",
-            "x": float(x),
-            "y": float(y + 75),
-            "width": 250,
-            "height": 40,
-            "fill": "#FFFFFF",
-            "rotation": 0,
-            "stroke": "#000000",
-            "strokeWidth": 0,
-        })
-        
-        # Password label
-        shapes.append({
-            "id": generate_shape_id(),
-            "type": "text",
-            "x": float(x),
-            "y": float(y + 130),
-            "text": "Password:",
-            "fontSize": 14,
-            "fontFamily": "Arial",
-            "fill": "#333333",
-            "width": 100,
-            "height": 20,
-            "stroke": "#000000",
-            "strokeWidth": 0,
-        })
-        
-        # Password field
-        shapes.append({
-            "id": generate_shape_id(),
-            "type": "rectangle",
-            "x": float(x),
-            "y": float(y + 155),
-            "width": 250,
-            "height": 40,
-            "fill": "#FFFFFF",
-            "rotation": 0,
-            "stroke": "#000000",
-            "strokeWidth": 0,
-        })
-        
-        # Submit button
-        shapes.append({
-            "id": generate_shape_id(),
-            "type": "rectangle",
-            "x": float(x),
-            "y": float(y + 215),
-            "width": 250,
-            "height": 45,
-            "fill": "#007BFF",
-            "rotation": 0,
-            "stroke": "#000000",
-            "strokeWidth": 0,
-        })
-        
-        # Button text
-        shapes.append({
-            "id": generate_shape_id(),
-            "type": "text",
-            "x": float(x + 85),
-            "y": float(y + 227),
-            "text": "Login",
-            "fontSize": 16,
-            "fontFamily": "Arial",
-            "fill": "#FFFFFF",
-            "width": 80,
-            "height": 20,
-            "stroke": "#000000",
-            "strokeWidth": 0,
-        })
+        ids = generate_shape_ids(len(_LOGIN_LAYOUT))
+        shapes = [
+            {**template, "id": shape_id, "x": x + dx, "y": y + dy}
+            for shape_id, (template, dx, dy) in zip(ids, _LOGIN_LAYOUT)
+        ]
     
     try:
-        success = create_shapes_batch_in_firestore(
-            shapes=shapes,
-            canvas_id=canvas_id,
-            session_id="ai-agent"
-        )
+        success = create_shapes_batch_trusted(shapes, canvas_id=canvas_id)
         
         if success:
             return {
@@ -1159,41 +1620,53 @@ def create_form(
         }
 
 
-# ==================== BATCH OPERATIONS ====================
-
 @tool
-def create_shapes_batch(
-    shapes: List[Dict[str, Any]],
+def create_form(
+    form_type: str = "login",
+    x: float = 200,
+    y: float = 150,
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Create multiple shapes at once. Use for 3+ shapes. Handles any quantity (10, 100, 1000+) in one call.
+    Create a form with multiple elements (title, labels, fields, button).
     
     Args:
-        shapes: List of shape dictionaries, each with: id, type, x, y, width, height, fill, rotation
+        form_type: Type of form ("login", "signup", or "contact") - default: "login"
+        x: Starting X position (default: 200)
+        y: Starting Y position (default: 150)
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _create_form_impl(form_type=form_type, x=x, y=y, canvas_id=canvas_id)
+
+
+# ==================== BATCH OPERATIONS ====================
+
+def _create_shapes_batch_impl(
+    shapes: List[Dict[str, Any]],
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the create_shapes_batch tool"""
     try:
-        # Validate and normalize shapes
-        for i, shape in enumerate(shapes):
+        # Validate shapes (index only computed when a shape is invalid)
+        missing_type = next((i for i, s in enumerate(shapes) if 'type' not in s), None)
+        if missing_type is not None:
+            return {
+                "success": False,
+                "message": f"Shape {missing_type} is missing required field 'type'"
+            }
+        
+        # Normalize each distinct color once (batches usually share a few colors)
+        norm_map = {fill: normalize_color(fill) for fill in {s['fill'] for s in shapes if 'fill' in s}}
+        for shape in shapes:
             if 'id' not in shape:
                 shape['id'] = generate_shape_id()
-            if 'type' not in shape:
-                return {
-                    "success": False,
-                    "message": f"Shape {i} is missing required field 'type'"
-                }
             if 'fill' in shape:
-                shape['fill'] = normalize_color(shape['fill'])
+                shape['fill'] = norm_map[shape['fill']]
         
-        success = create_shapes_batch_in_firestore(
-            shapes=shapes,
-            canvas_id=canvas_id,
-            session_id="ai-agent"
-        )
+        success = create_shapes_batch_trusted(shapes, canvas_id=canvas_id)
         
         if success:
             return {
@@ -1214,20 +1687,28 @@ def create_shapes_batch(
 
 
 @tool
-def update_shapes_batch(
-    updates: List[Dict[str, Any]],
+def create_shapes_batch(
+    shapes: List[Dict[str, Any]],
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Update multiple shapes at once. Use for 3+ shapes. Each update must include shape_id and fields to update.
+    Create multiple shapes at once. Use for 3+ shapes. Handles any quantity (10, 100, 1000+) in one call.
     
     Args:
-        updates: List of update dictionaries with shape_id and fields to update (x, y, width, height, fill, rotation)
+        shapes: List of shape dictionaries, each with: id, type, x, y, width, height, fill, rotation
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _create_shapes_batch_impl(shapes=shapes, canvas_id=canvas_id)
+
+
+def _update_shapes_batch_impl(
+    updates: List[Dict[str, Any]],
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the update_shapes_batch tool"""
     try:
         # Validate updates
         for i, update in enumerate(updates):
@@ -1264,20 +1745,28 @@ def update_shapes_batch(
 
 
 @tool
-def delete_shapes_batch(
-    shape_ids: List[str],
+def update_shapes_batch(
+    updates: List[Dict[str, Any]],
     canvas_id: str = "main-canvas"
 ) -> Dict[str, Any]:
     """
-    Delete multiple shapes at once. Use for 3+ shapes.
+    Update multiple shapes at once. Use for 3+ shapes. Each update must include shape_id and fields to update.
     
     Args:
-        shape_ids: List of shape IDs to delete
+        updates: List of update dictionaries with shape_id and fields to update (x, y, width, height, fill, rotation)
         canvas_id: Canvas identifier (default: "main-canvas")
     
     Returns:
         Dictionary with success status and message
     """
+    return _update_shapes_batch_impl(updates=updates, canvas_id=canvas_id)
+
+
+def _delete_shapes_batch_impl(
+    shape_ids: List[str],
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """Body of the delete_shapes_batch tool"""
     try:
         if not shape_ids or len(shape_ids) == 0:
             return {
@@ -1308,8 +1797,26 @@ def delete_shapes_batch(
         }
 
 
-# Export all tools
-ALL_TOOLS = [
+@tool
+def delete_shapes_batch(
+    shape_ids: List[str],
+    canvas_id: str = "main-canvas"
+) -> Dict[str, Any]:
+    """
+    Delete multiple shapes at once. Use for 3+ shapes.
+    
+    Args:
+        shape_ids: List of shape IDs to delete
+        canvas_id: Canvas identifier (default: "main-canvas")
+    
+    Returns:
+        Dictionary with success status and message
+    """
+    return _delete_shapes_batch_impl(shape_ids=shape_ids, canvas_id=canvas_id)
+
+
+# Export all tools (immutable, built once at import)
+ALL_TOOLS: Tuple[BaseTool, ...] = (
     # Read operations (call first to understand canvas state)
     get_canvas_shapes,
     
@@ -1323,6 +1830,7 @@ ALL_TOOLS = [
     # Manipulation operations (require shape_id from get_canvas_shapes)
     move_shape,
     move_random_shapes,         # NEW: Move N shapes by offset (FAST! No IDs needed)
+    move_shapes,                # Move specific shapes by offset in one batch
     resize_shape,
     rotate_shape,
     change_shape_color,
@@ -1335,4 +1843,11 @@ ALL_TOOLS = [
     create_shapes_batch,
     update_shapes_batch,
     delete_shapes_batch,
-]
+)
+
+# Tools that never change the canvas; a turn that only called these can be
+# answered again from the response cache
+READ_ONLY_TOOLS = frozenset((get_canvas_shapes.name,))
+
+# Name -> tool lookup so callers never scan ALL_TOOLS
+TOOLS_BY_NAME: Mapping[str, BaseTool] = MappingProxyType({t.name: t for t in ALL_TOOLS})
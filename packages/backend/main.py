@@ -7,19 +7,38 @@ canvas manipulation capabilities using LangChain and OpenAI.
 
 import os
 import asyncio
+import random
+import secrets
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException, status, BackgroundTasks
-from fastapi.middleware.cors import CORSMiddleware
+import anyio
+from fastapi import FastAPI, HTTPException, status, BackgroundTasks, Header
+from fastapi.responses import ORJSONResponse, Response
+from starlette.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import logging
+import orjson
 
 from agents.canvas_agent import execute_canvas_command, initialize_agent, check_agent_health, get_agent_stats
 from version import __version__, __version_name__
+from middleware import ETagMiddleware, FastCORS, RequestStats, TimingMiddleware, make_etag
+from services.command_coalescer import command_key, run_coalesced
+from services.session_manager import SessionManager, CLEANUP_INTERVAL
+from services.firebase_service import warm_up_firestore
 
 # Load environment variables
 load_dotenv()
 
+# The key doesn't change at runtime, so check it once instead of on every request
+_openai_key = os.getenv("OPENAI_API_KEY")
+OPENAI_CONFIGURED = bool(_openai_key and _openai_key != "your-openai-api-key-here")
+
+# /metrics requires "Authorization: Bearer <METRICS_TOKEN>" when set, and is
+# disabled in production without it
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,32 +46,148 @@ logger = logging.getLogger(__name__)
 # Log version on startup
 logger.info(f"=== CollabCanvas Backend v{__version__} ({__version_name__}) ===")
 
+# ============================================================================
+# Lifespan (startup / shutdown)
+# ============================================================================
+
+# Health checks run every 10 minutes, +/- jitter so workers and replicas
+# started together don't all probe at the same moment
+HEALTH_CHECK_INTERVAL = 600
+HEALTH_CHECK_JITTER = 30
+
+
+async def agent_health_monitor():
+    """Background task that checks agent health every 10 minutes"""
+    while True:
+        await anyio.sleep(HEALTH_CHECK_INTERVAL + random.uniform(-HEALTH_CHECK_JITTER, HEALTH_CHECK_JITTER))
+        # An error escaping the task group would take the whole app down
+        try:
+            check_agent_health()
+        except Exception as e:
+            logger.error(f"Agent health check failed: {e}")
+
+
+async def session_cleanup_monitor():
+    """Background task that removes expired AI conversation sessions"""
+    while True:
+        await anyio.sleep(CLEANUP_INTERVAL)
+        try:
+            SessionManager.cleanup_expired_sessions()
+        except Exception as e:
+            logger.error(f"Session cleanup failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan handler
+    
+    Logs configuration, checks API key, initializes the AI agent and starts the
+    background monitors before the first request. The monitors run in a task
+    group, so shutdown cancels them and waits until they have stopped.
+    """
+    logger.info("=" * 60)
+    logger.info("CollabCanvas AI Backend Starting...")
+    logger.info("=" * 60)
+    logger.info(f"Environment: {os.getenv('ENVIRONMENT', 'development')}")
+    logger.info(f"Port: {os.getenv('PORT', '8000')}")
+    logger.info(f"Allowed Origins: {sorted(allowed_origins)}")
+    
+    # AI commands run on the default executor via asyncio.to_thread. Its stock
+    # size, min(32, cpus + 4), would cap concurrent commands on small instances.
+    ai_workers = int(os.getenv("AI_WORKERS", "32"))
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=ai_workers, thread_name_prefix="ai-command")
+    )
+    logger.info(f"AI Workers: {ai_workers}")
+    
+    if OPENAI_CONFIGURED:
+        logger.info("✓ OpenAI API Key: Configured")
+    else:
+        logger.warning("✗ OpenAI API Key: NOT CONFIGURED - AI features will not work!")
+        logger.warning("  Please set OPENAI_API_KEY in your .env file")
+    
+    # Initialize AI Agent at startup (zero latency on first call)
+    logger.info("🤖 Initializing AI Agent...")
+    try:
+        initialize_agent()
+        logger.info("✓ AI Agent: Initialized and ready")
+    except Exception as e:
+        logger.error(f"✗ AI Agent: Failed to initialize - {e}")
+    
+    # Connect to Firestore and load the default canvas now rather than on the
+    # first command (credentials, TLS/gRPC handshake, initial shape read)
+    logger.info("🔥 Warming up Firestore...")
+    try:
+        if await asyncio.to_thread(warm_up_firestore):
+            logger.info("✓ Firestore: Connected, main canvas loaded")
+        else:
+            logger.warning("✗ Firestore: Connected, main canvas still loading")
+    except Exception as e:
+        logger.error(f"✗ Firestore: Warm-up failed - {e}")
+    
+    async with anyio.create_task_group() as tg:
+        # Start background health check task
+        tg.start_soon(agent_health_monitor)
+        logger.info("✓ Agent Health Monitor: Started (10min interval)")
+        
+        # Expired sessions are swept here instead of on every AI command
+        tg.start_soon(session_cleanup_monitor)
+        logger.info(f"✓ Session Cleanup: Started ({CLEANUP_INTERVAL}s interval)")
+        
+        logger.info("=" * 60)
+        
+        yield
+        
+        tg.cancel_scope.cancel()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="CollabCanvas AI API",
     description="AI-powered canvas manipulation API using LangChain and OpenAI GPT-4o-mini",
     version=__version__,
+    default_response_class=ORJSONResponse,  # orjson encodes float-heavy shape lists much faster
+    lifespan=lifespan,
 )
 
 # Get allowed origins from environment
 # For development, allow all localhost ports (Vite uses 5170-5189)
+# (a frozenset: FastCORS checks each request's Origin with one hash lookup)
 if os.getenv("ALLOWED_ORIGINS"):
-    allowed_origins = [origin.strip() for origin in os.getenv("ALLOWED_ORIGINS").split(",")]
+    allowed_origins = frozenset(origin.strip() for origin in os.getenv("ALLOWED_ORIGINS").split(","))
 else:
-    # Generate localhost ports 5170-5189 for Vite dev server
-    allowed_origins = [f"http://localhost:{port}" for port in range(5170, 5190)]
-    # Add common dev ports
-    allowed_origins.extend(["http://localhost:3000", "http://localhost:8080"])
+    # Localhost ports 5170-5189 for Vite dev server plus common dev ports
+    allowed_origins = frozenset(
+        [f"http://localhost:{port}" for port in range(5170, 5190)]
+        + ["http://localhost:3000", "http://localhost:8080"]
+    )
+
+# Small polled GET endpoints answer 304 Not Modified while their body is unchanged
+app.add_middleware(
+    ETagMiddleware,
+    paths=("/", "/version", "/health", "/agent/health"),
+)
 
-# Configure CORS
+# Compress larger JSON responses (shape lists repeat the same keys and colors,
+# so they shrink several times over); level 4 keeps the CPU cost low
 app.add_middleware(
-    CORSMiddleware,
+    GZipMiddleware,
+    minimum_size=1024,
+    compresslevel=4,
+)
+
+# Configure CORS (pure ASGI; same behavior as CORSMiddleware with credentials
+# and all methods/headers allowed)
+app.add_middleware(
+    FastCORS,
     allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
 )
 
+# Per-route latency stats, served at /metrics (added last so it times everything)
+request_stats = RequestStats()
+app.add_middleware(TimingMiddleware, stats=request_stats)
+
 # ============================================================================
 # Pydantic Models
 # ============================================================================
@@ -117,20 +252,26 @@ async def root():
             "health": "/health",
             "version": "/version",
             "agent_health": "/agent/health",
+            "metrics": "/metrics",
             "ai_command": "/api/ai/command",
             "docs": "/docs",
         }
     }
 
 
+# The version never changes while the process runs, so encode it once
+_VERSION_JSON = orjson.dumps({
+    "version": __version__,
+    "name": __version_name__,
+    "message": f"CollabCanvas Backend v{__version__} ({__version_name__})"
+})
+_VERSION_ETAG = make_etag(_VERSION_JSON)
+
+
 @app.get("/version")
 async def get_version():
     """Get backend version information"""
-    return {
-        "version": __version__,
-        "name": __version_name__,
-        "message": f"CollabCanvas Backend v{__version__} ({__version_name__})"
-    }
+    return Response(_VERSION_JSON, media_type="application/json", headers={"etag": _VERSION_ETAG})
 
 
 @app.get("/agent/health")
@@ -150,16 +291,32 @@ async def health_check():
     
     Returns the health status of the API and whether OpenAI API key is configured.
     """
-    openai_key = os.getenv("OPENAI_API_KEY")
-    
     return {
         "status": "healthy",
         "environment": os.getenv("ENVIRONMENT", "development"),
-        "openai_configured": bool(openai_key and openai_key != "your-openai-api-key-here"),
+        "openai_configured": OPENAI_CONFIGURED,
         "model": "gpt-4o-mini",
     }
 
 
+@app.get("/metrics")
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Request metrics endpoint
+    
+    Returns request counts, status codes and latency (avg/p50/p95/max) per route
+    since the process started. Protected by METRICS_TOKEN when it is set;
+    without it, only available outside production.
+    """
+    if METRICS_TOKEN:
+        if not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    elif os.getenv("ENVIRONMENT", "development") == "production":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    
+    return request_stats.snapshot()
+
+
 @app.post("/api/ai/command", response_model=AICommandResponse)
 async def execute_ai_command(request: AICommandRequest):
     """
@@ -178,28 +335,31 @@ async def execute_ai_command(request: AICommandRequest):
         HTTPException: If OpenAI API key is not configured or execution fails
     """
     # Validate OpenAI API key is configured
-    openai_key = os.getenv("OPENAI_API_KEY")
-    if not openai_key or openai_key == "your-openai-api-key-here":
+    if not OPENAI_CONFIGURED:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="OpenAI API key is not configured. Please set OPENAI_API_KEY environment variable."
         )
     
-    logger.info(f"Executing AI command: {request.command}")
+    logger.info("Executing AI command: %s", request.command)
     
     try:
         # Convert viewport to dict if present
-        viewport_dict = None
-        if request.viewport:
-            viewport_dict = {
-                "x_min": request.viewport.x_min,
-                "y_min": request.viewport.y_min,
-                "x_max": request.viewport.x_max,
-                "y_max": request.viewport.y_max
-            }
+        viewport_dict = request.viewport.model_dump() if request.viewport else None
         
-        # Execute command using the AI agent
-        result = execute_canvas_command(
+        # Execute command using the AI agent in a worker thread, so the blocking
+        # OpenAI and Firestore calls don't stall the event loop for other requests.
+        # A repeat of a command this tab already has in flight shares that run.
+        key = command_key(
+            request.command,
+            request.canvas_id,
+            request.user_id,
+            request.session_id,
+            viewport_dict,
+        )
+        result = await run_coalesced(
+            key,
+            execute_canvas_command,
             command=request.command,
             canvas_id=request.canvas_id,
             user_id=request.user_id,
@@ -207,9 +367,11 @@ async def execute_ai_command(request: AICommandRequest):
             viewport=viewport_dict
         )
         
-        logger.info(f"Command executed successfully. Generated {len(result['shapes'])} shape(s)")
+        logger.info("Command executed successfully. Generated %d shape(s)", len(result['shapes']))
         
-        return AICommandResponse(**result)
+        # execute_canvas_command always builds this exact shape, so encode it
+        # straight to JSON; response_model only documents it in the OpenAPI schema
+        return ORJSONResponse({"error": None, **result})
     
     except Exception as e:
         logger.error(f"Error executing command: {str(e)}")
@@ -219,53 +381,6 @@ async def execute_ai_command(request: AICommandRequest):
         )
 
 
-# ============================================================================
-# Startup Event
-# ============================================================================
-
-async def agent_health_monitor():
-    """Background task that checks agent health every 10 minutes"""
-    while True:
-        await asyncio.sleep(600)  # 10 minutes = 600 seconds
-        check_agent_health()
-
-
-@app.on_event("startup")
-async def startup_event():
-    """
-    Startup event handler
-    
-    Logs configuration, checks API key, and initializes AI agent.
-    """
-    logger.info("=" * 60)
-    logger.info("CollabCanvas AI Backend Starting...")
-    logger.info("=" * 60)
-    logger.info(f"Environment: {os.getenv('ENVIRONMENT', 'development')}")
-    logger.info(f"Port: {os.getenv('PORT', '8000')}")
-    logger.info(f"Allowed Origins: {allowed_origins}")
-    
-    openai_key = os.getenv("OPENAI_API_KEY")
-    if openai_key and openai_key != "your-openai-api-key-here":
-        logger.info("✓ OpenAI API Key: Configured")
-    else:
-        logger.warning("✗ OpenAI API Key: NOT CONFIGURED - AI features will not work!")
-        logger.warning("  Please set OPENAI_API_KEY in your .env file")
-    
-    # Initialize AI Agent at startup (zero latency on first call)
-    logger.info("🤖 Initializing AI Agent...")
-    try:
-        initialize_agent()
-        logger.info("✓ AI Agent: Initialized and ready")
-    except Exception as e:
-        logger.error(f"✗ AI Agent: Failed to initialize - {e}")
-    
-    # Start background health check task
-    asyncio.create_task(agent_health_monitor())
-    logger.info("✓ Agent Health Monitor: Started (10min interval)")
-    
-    logger.info("=" * 60)
-
-
 # ============================================================================
 # Main Entry Point (for local development)
 # ============================================================================
@@ -0,0 +1,315 @@
+"""
+ASGI middleware for the CollabCanvas backend
+
+Written directly against the ASGI interface (scope/receive/send) instead of
+Starlette's Request/Response classes, so the per-request work is limited to
+a scan of the raw header list.
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import time
+
+Headers = List[Tuple[bytes, bytes]]
+
+# Upper bounds (seconds) of the request latency histogram buckets; anything
+# slower lands in a final overflow bucket
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+# allow_methods=["*"] in Starlette's CORSMiddleware expands to this list
+CORS_ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+
+async def _send_plain(send, status: int, body: bytes, headers: Headers) -> None:
+    """Send a complete text/plain response."""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class FastCORS:
+    """
+    CORS for credentialed requests from a known set of origins
+    
+    Behaves like CORSMiddleware(allow_credentials=True, allow_methods=["*"],
+    allow_headers=["*"]): allowed origins are echoed back, preflights are
+    answered here without reaching the app, and requests from other origins
+    pass through without CORS headers.
+    
+    Args:
+        app: ASGI application to wrap
+        allow_origins: Exact origins to allow (e.g. "http://localhost:5173")
+        max_age: Seconds browsers may cache a preflight result
+    """
+    
+    def __init__(
+        self,
+        app,
+        allow_origins: Iterable[str] = (),
+        max_age: int = 600,
+    ):
+        self.app = app
+        self.origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        
+        # Header lists that never vary, built once
+        self.simple_headers: Headers = [
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+        self.preflight_headers: Headers = [
+            (b"access-control-allow-methods", CORS_ALLOW_METHODS),
+            (b"access-control-max-age", str(max_age).encode()),
+            *self.simple_headers,
+        ]
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        
+        # Same-origin and non-browser requests
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+        
+        allowed = origin in self.origins
+        
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            if not allowed:
+                await _send_plain(send, 400, b"Disallowed CORS origin", self.preflight_headers)
+                return
+            
+            headers = [(b"access-control-allow-origin", origin), *self.preflight_headers]
+            if request_headers is not None:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await _send_plain(send, 200, b"OK", headers)
+            return
+        
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+        
+        cors_headers = [(b"access-control-allow-origin", origin), *self.simple_headers]
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", ()), *cors_headers]}
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag (quoted hash) for a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def _etag_matches(etag: bytes, if_none_match: bytes) -> bool:
+    """Whether an If-None-Match header value matches an ETag (weak comparison)."""
+    for tag in if_none_match.split(b","):
+        tag = tag.strip()
+        if tag == b"*":
+            return True
+        if tag.startswith(b"W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    """
+    ETag / If-None-Match support for small, mostly constant GET responses
+    
+    Responses from the given paths are buffered and tagged with an ETag
+    (unless the endpoint already set one). A request whose If-None-Match
+    matches gets 304 Not Modified with no body, so pollers such as health
+    checks only transfer headers while nothing has changed.
+    
+    Args:
+        app: ASGI application to wrap
+        paths: Exact request paths to handle; everything else passes through
+    """
+    
+    # Headers that describe the body, which a 304 doesn't carry
+    BODY_HEADERS = frozenset((b"content-length", b"content-type", b"content-encoding"))
+    
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = frozenset(paths)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value
+                break
+        
+        start = None
+        chunks: List[bytes] = []
+        
+        async def send_tagged(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._respond(send, start, b"".join(chunks), if_none_match)
+        
+        await self.app(scope, receive, send_tagged)
+    
+    async def _respond(self, send, start, body: bytes, if_none_match: Optional[bytes]) -> None:
+        """Send a buffered response, or a 304 if the client's copy is current."""
+        if start["status"] != 200:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        headers = list(start.get("headers", ()))
+        etag = next((value for name, value in headers if name == b"etag"), None)
+        if etag is None:
+            etag = make_etag(body).encode()
+            headers.append((b"etag", etag))
+        
+        if if_none_match is not None and _etag_matches(etag, if_none_match):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(name, value) for name, value in headers if name not in self.BODY_HEADERS],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class RequestStats:
+    """
+    In-process request latency stats per method and path
+    
+    Latencies are counted into fixed histogram buckets, so memory stays
+    constant however many requests are recorded; percentiles are reported as
+    the upper bound of the bucket they fall in (capped at the observed max).
+    """
+    
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.routes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    
+    def record(self, method: str, path: str, status: int, seconds: float) -> None:
+        """Count one finished request."""
+        route = self.routes.get((method, path))
+        if route is None:
+            route = self.routes[(method, path)] = {
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "statuses": {},
+                "histogram": [0] * (len(self.buckets) + 1),
+            }
+        
+        route["count"] += 1
+        route["total"] += seconds
+        if seconds > route["max"]:
+            route["max"] = seconds
+        route["statuses"][status] = route["statuses"].get(status, 0) + 1
+        route["histogram"][bisect_left(self.buckets, seconds)] += 1
+    
+    def _percentile(self, route: Dict[str, Any], q: float) -> float:
+        """Approximate latency percentile (seconds) from a route's histogram."""
+        rank = q * route["count"]
+        cumulative = 0
+        for i, n in enumerate(route["histogram"]):
+            cumulative += n
+            if cumulative >= rank:
+                return min(self.buckets[i], route["max"]) if i < len(self.buckets) else route["max"]
+        return route["max"]
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize the recorded requests
+        
+        Returns:
+            "METHOD /path" -> count, status counts and avg/p50/p95/max latency in ms
+        """
+        return {
+            f"{method} {path}": {
+                "count": route["count"],
+                "statuses": {str(code): n for code, n in sorted(route["statuses"].items())},
+                "avg_ms": round(route["total"] / route["count"] * 1000, 1),
+                "p50_ms": round(self._percentile(route, 0.50) * 1000, 1),
+                "p95_ms": round(self._percentile(route, 0.95) * 1000, 1),
+                "max_ms": round(route["max"] * 1000, 1),
+            }
+            for (method, path), route in sorted(self.routes.items())
+        }
+
+
+class TimingMiddleware:
+    """
+    Record how long each HTTP request takes into a RequestStats
+    
+    Timing covers the whole response, body included. Requests are keyed on
+    the route template they matched (e.g. "/api/ai/command"); everything
+    that reached no route (404s, preflights answered by FastCORS) is grouped
+    under one path, so scanners can't grow the table.
+    
+    Args:
+        app: ASGI application to wrap
+        stats: RequestStats that receives the timings
+    """
+    
+    def __init__(self, app, stats: RequestStats):
+        self.app = app
+        self.stats = stats
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope dict
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            self.stats.record(scope["method"], path, status, time.perf_counter() - start)
@@ -0,0 +1,76 @@
+"""
+Coalescing of duplicate in-flight AI commands
+
+A browser tab that submits the same command again while the first one is
+still running (double-click, Enter pressed twice, client retry) would start a
+second agent run and a second OpenAI round-trip, and apply the command to the
+canvas twice. Identical commands from the same tab instead share the run that
+is already in flight and all receive its result.
+
+Commands from different tabs are never merged: two users asking for
+"a red circle" at the same time expect two circles.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Session ID the API falls back to when the client doesn't send one. It is
+# shared by every such client, so it can't identify a single tab.
+DEFAULT_SESSION_ID = "ai-agent"
+
+# Coalescing key -> task running that command
+_in_flight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+
+def command_key(
+    command: str,
+    canvas_id: str,
+    user_id: Optional[str],
+    session_id: Optional[str],
+    viewport: Optional[Dict[str, float]] = None,
+) -> Optional[Hashable]:
+    """
+    Build the key under which identical commands are coalesced.
+    
+    Args:
+        command: Natural language command
+        canvas_id: Canvas the command targets
+        user_id: User making the request
+        session_id: Browser tab session ID
+        viewport: Visible canvas bounds sent with the command
+    
+    Returns:
+        Hashable key, or None if the request can't be tied to one tab
+    """
+    if not session_id or session_id == DEFAULT_SESSION_ID:
+        return None
+    
+    viewport_key = tuple(sorted(viewport.items())) if viewport else None
+    return (session_id, user_id, canvas_id, command.strip(), viewport_key)
+
+
+async def run_coalesced(key: Optional[Hashable], fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking function in a worker thread, sharing the run with identical callers.
+    
+    If a call with the same key is already in flight, waits for its result
+    instead of starting another one. A key of None always starts a new run.
+    
+    Args:
+        key: Coalescing key from command_key()
+        fn: Blocking function to run (e.g. execute_canvas_command)
+    
+    Returns:
+        The function's result
+    """
+    if key is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    
+    # One caller disconnecting must not cancel the run the others are waiting on
+    return await asyncio.shield(task)
@@ -7,11 +7,15 @@ to maintain data consistency.
 """
 
 import os
-import json
+import orjson
 import firebase_admin
 from firebase_admin import credentials, firestore
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +24,24 @@ logger = logging.getLogger(__name__)
 _db = None
 _initialized = False
 
+# Shape fields left out of written documents when they hold these values.
+# The frontend restores them when reading (SHAPE_FIELD_DEFAULTS in utils/canvas.js).
+SHAPE_FIELD_DEFAULTS = {
+    'stroke': '#000000',
+    'strokeWidth': 0,
+    'rotation': 0,
+}
+
+# Sentinel that Firestore replaces with the commit time; one shared instance
+# instead of an attribute lookup through the firestore module per field
+_SERVER_TIMESTAMP = firestore.SERVER_TIMESTAMP
+
+# Firestore rejects WriteBatches with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
+
+# Commits independent WriteBatches of one large operation concurrently
+_COMMIT_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="firestore-commit")
+
 
 def initialize_firebase():
     """
@@ -43,7 +65,7 @@ def initialize_firebase():
         
         if service_account_json:
             logger.info("Initializing Firebase Admin from JSON environment variable")
-            cred_dict = json.loads(service_account_json)
+            cred_dict = orjson.loads(service_account_json)
             cred = credentials.Certificate(cred_dict)
         else:
             # Option 2: Load from file path (development)
@@ -71,16 +93,319 @@ def initialize_firebase():
         raise
 
 
+@lru_cache(maxsize=1)
 def get_firestore_client():
     """
     Get Firestore client instance
     
+    Cached for the life of the process so every tool call reuses the same
+    client (and its gRPC channel). A failed initialization is not cached.
+    
     Returns:
         Firestore client
     """
-    if _db is None or not _initialized:
-        initialize_firebase()
-    return _db
+    return initialize_firebase()
+
+
+@lru_cache(maxsize=32)
+def get_shapes_ref(canvas_id: str = "main-canvas"):
+    """
+    Get the shapes collection reference for a canvas
+    
+    Path: canvases/{canvas_id}/shapes. References are immutable, so one per
+    canvas is built and reused by every read and write.
+    
+    Args:
+        canvas_id: ID of the canvas (default: "main-canvas")
+    
+    Returns:
+        Firestore CollectionReference
+    """
+    return get_firestore_client().collection('canvases').document(canvas_id).collection('shapes')
+
+
+def _commit_batches(batches: List[Any]) -> None:
+    """
+    Commit WriteBatches concurrently and wait for all of them
+    
+    Each batch is atomic on its own, but a failure in one does not roll back
+    the others.
+    
+    Args:
+        batches: WriteBatches holding at most FIRESTORE_BATCH_LIMIT writes each
+    
+    Raises:
+        The first commit error, after every commit has finished
+    """
+    if len(batches) <= 1:
+        for batch in batches:
+            batch.commit()
+        return
+    
+    futures = [_COMMIT_POOL.submit(batch.commit) for batch in batches]
+    errors = [f.exception() for f in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+
+
+def _set_documents(shapes_ref, documents: List[Any]) -> None:
+    """
+    Write new shape documents
+    
+    Documents are split into WriteBatches of up to FIRESTORE_BATCH_LIMIT
+    writes, committed in parallel through _commit_batches. (A BulkWriter with
+    default options is throttled to 500 writes/s, far slower than this.)
+    
+    Args:
+        shapes_ref: Shapes collection reference of the canvas
+        documents: (shape_id, document data) pairs
+    
+    Raises:
+        The first commit error, after every commit has finished
+    """
+    db = get_firestore_client()
+    batches = []
+    
+    for i, (shape_id, data) in enumerate(documents):
+        if i % FIRESTORE_BATCH_LIMIT == 0:
+            batch = db.batch()
+            batches.append(batch)
+        batch.set(shapes_ref.document(shape_id), data)
+    
+    _commit_batches(batches)
+
+
+# ==================== SHAPE MIRROR ====================
+
+# canvas_id -> {shape_id: shape dict including 'id'}, kept current by a
+# Firestore snapshot listener so reads don't re-stream the whole collection
+_shape_mirrors: Dict[str, Dict[str, Dict[str, Any]]] = {}
+# Also the LRU order of mirrored canvases (least recently read first)
+_mirror_ready: "OrderedDict[str, threading.Event]" = OrderedDict()
+_mirror_watches: Dict[str, Any] = {}
+_mirror_lock = threading.Lock()
+
+# How long a read waits for a new listener's first snapshot before falling
+# back to fetching the collection directly
+MIRROR_READY_TIMEOUT = 2.0
+
+# Each mirrored canvas holds a listener stream, a consumer thread and billed
+# reads; canvas IDs come from clients, so only the most recently used are kept
+MAX_MIRRORED_CANVASES = 16
+
+
+def _watch_canvas(canvas_id: str) -> threading.Event:
+    """
+    Start mirroring a canvas's shapes (once per canvas)
+    
+    Starting a new mirror beyond MAX_MIRRORED_CANVASES stops the one that
+    was used least recently.
+    
+    Args:
+        canvas_id: ID of the canvas
+    
+    Returns:
+        Event that is set once the listener's first snapshot has been applied
+    """
+    with _mirror_lock:
+        ready = _mirror_ready.get(canvas_id)
+        if ready is not None:
+            _mirror_ready.move_to_end(canvas_id)
+            return ready
+        ready = _mirror_ready[canvas_id] = threading.Event()
+        
+        evicted = []
+        while len(_mirror_ready) > MAX_MIRRORED_CANVASES:
+            old_canvas_id, old_ready = _mirror_ready.popitem(last=False)
+            # Readers still waiting on it find no mirror and fall back to a fetch
+            old_ready.set()
+            _shape_mirrors.pop(old_canvas_id, None)
+            evicted.append((old_canvas_id, _mirror_watches.pop(old_canvas_id, None)))
+    
+    for old_canvas_id, old_watch in evicted:
+        logger.info(f"Stopping shape listener for least recently used canvas '{old_canvas_id}'")
+        _unsubscribe(old_canvas_id, old_watch)
+    
+    mirror: Dict[str, Dict[str, Any]] = {}
+    
+    def on_snapshot(docs, changes, read_time):
+        with _mirror_lock:
+            # A late callback from a stopped listener must not bring its mirror back
+            if _mirror_ready.get(canvas_id) is not ready:
+                return
+            for change in changes:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    mirror.pop(doc.id, None)
+                else:
+                    mirror[doc.id] = {**doc.to_dict(), 'id': doc.id}
+            _shape_mirrors[canvas_id] = mirror
+        ready.set()
+    
+    try:
+        watch = get_shapes_ref(canvas_id).on_snapshot(on_snapshot)
+    except Exception:
+        with _mirror_lock:
+            if _mirror_ready.get(canvas_id) is ready:
+                del _mirror_ready[canvas_id]
+        raise
+    
+    with _mirror_lock:
+        # Evicted while the listener was starting
+        stopped = _mirror_ready.get(canvas_id) is not ready
+        if not stopped:
+            _mirror_watches[canvas_id] = watch
+    if stopped:
+        _unsubscribe(canvas_id, watch)
+        ready.set()
+        return ready
+    
+    logger.info(f"Started shape listener for canvas '{canvas_id}'")
+    return ready
+
+
+def _stop_watch(canvas_id: str) -> None:
+    """Drop a canvas mirror and its listener; the next read starts a new one."""
+    with _mirror_lock:
+        _mirror_ready.pop(canvas_id, None)
+        _shape_mirrors.pop(canvas_id, None)
+        watch = _mirror_watches.pop(canvas_id, None)
+    
+    _unsubscribe(canvas_id, watch)
+
+
+def _unsubscribe(canvas_id: str, watch: Any) -> None:
+    """Stop a snapshot listener, if there is one."""
+    if watch is not None:
+        try:
+            watch.unsubscribe()
+        except Exception as e:
+            logger.warning(f"Error stopping shape listener for canvas '{canvas_id}': {e}")
+
+
+def warm_up_firestore(canvas_id: str = "main-canvas") -> bool:
+    """
+    Initialize Firestore and start a canvas's mirror ahead of the first command
+    
+    Parses the credentials, opens the gRPC channel and loads the canvas's
+    shapes at startup, so the first AI command doesn't pay for any of it.
+    
+    Args:
+        canvas_id: Canvas to start mirroring
+    
+    Returns:
+        True if the mirror received its first snapshot in time
+    """
+    get_firestore_client()
+    return _watch_canvas(canvas_id).wait(MIRROR_READY_TIMEOUT)
+
+
+def _read_mirror(canvas_id: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Copy a canvas's shapes out of its mirror
+    
+    Args:
+        canvas_id: ID of the canvas
+    
+    Returns:
+        List of shape dictionaries, or None if the mirror isn't usable
+    """
+    try:
+        ready = _watch_canvas(canvas_id)
+    except Exception as e:
+        logger.warning(f"Could not start shape listener for canvas '{canvas_id}': {e}")
+        return None
+    
+    live = ready.wait(MIRROR_READY_TIMEOUT)
+    
+    # The watch handle can lag the first callback by a moment while on_snapshot
+    # returns. A listener that closed (e.g. after a stream error) is restarted.
+    watch = _mirror_watches.get(canvas_id)
+    if watch is not None and not watch.is_active:
+        logger.warning(f"Shape listener for canvas '{canvas_id}' has stopped, restarting it")
+        _stop_watch(canvas_id)
+        return None
+    
+    # A large canvas's first snapshot can take longer than the timeout; this
+    # read falls back to a fetch, but the listener keeps loading for later ones
+    if not live:
+        logger.info(f"Shape listener for canvas '{canvas_id}' is still loading, fetching directly")
+        return None
+    
+    with _mirror_lock:
+        mirror = _shape_mirrors.get(canvas_id)
+        if mirror is None:
+            return None
+        return [dict(shape) for shape in mirror.values()]
+
+
+def get_mirrored_shapes(canvas_id: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get a canvas's shapes only if a live mirror already has them
+    
+    Never starts a listener, waits or reads Firestore, so it is cheap enough
+    for optional work such as the AI response cache.
+    
+    Args:
+        canvas_id: ID of the canvas
+    
+    Returns:
+        The mirrored shape dicts (shared with the mirror; do not modify them),
+        or None if the canvas has no live mirror
+    """
+    with _mirror_lock:
+        ready = _mirror_ready.get(canvas_id)
+        mirror = _shape_mirrors.get(canvas_id)
+        watch = _mirror_watches.get(canvas_id)
+        if ready is None or not ready.is_set() or mirror is None:
+            return None
+        if watch is not None and not watch.is_active:
+            return None
+        # Mirror entries are replaced, never mutated, so the dicts can be shared
+        return list(mirror.values())
+
+
+def _mirror_apply(
+    canvas_id: str,
+    sets: Iterable = (),
+    updates: Iterable = (),
+    deletes: Iterable[str] = ()
+) -> None:
+    """
+    Apply writes that were just committed to the canvas mirror
+    
+    The listener delivers them as well, but only after another round-trip;
+    applying them here lets a tool read back what it just wrote. Server
+    timestamps are left for the listener to fill in.
+    
+    Args:
+        canvas_id: ID of the canvas
+        sets: (shape_id, document) pairs of created shapes
+        updates: (shape_id, updated fields) pairs
+        deletes: IDs of deleted shapes
+    """
+    with _mirror_lock:
+        mirror = _shape_mirrors.get(canvas_id)
+        if mirror is None:
+            return
+        
+        for shape_id, fields in sets:
+            mirror[shape_id] = {
+                **mirror.get(shape_id, {}),
+                **{k: v for k, v in fields.items() if v is not _SERVER_TIMESTAMP},
+                'id': shape_id,
+            }
+        for shape_id, fields in updates:
+            # A shape the listener hasn't delivered yet will arrive complete from it
+            shape = mirror.get(shape_id)
+            if shape is not None:
+                mirror[shape_id] = {
+                    **shape,
+                    **{k: v for k, v in fields.items() if v is not _SERVER_TIMESTAMP},
+                }
+        for shape_id in deletes:
+            mirror.pop(shape_id, None)
 
 
 # ==================== SHAPE OPERATIONS ====================
@@ -89,7 +414,9 @@ def get_all_shapes(canvas_id: str = "main-canvas") -> List[Dict[str, Any]]:
     """
     Fetch all shapes from a canvas
     
-    This replicates the frontend's subscribeToShapes() function
+    This replicates the frontend's subscribeToShapes() function: shapes are
+    served from a listener-backed mirror of the canvas, and only fetched
+    directly while that mirror is unavailable.
     Path: canvases/{canvas_id}/shapes
     
     Args:
@@ -99,16 +426,15 @@ def get_all_shapes(canvas_id: str = "main-canvas") -> List[Dict[str, Any]]:
         List of shape dictionaries
     """
     try:
-        db = get_firestore_client()
-        shapes_ref = db.collection('canvases').document(canvas_id).collection('shapes')
+        shapes = _read_mirror(canvas_id)
+        if shapes is not None:
+            logger.info(f"Read {len(shapes)} shapes from canvas '{canvas_id}' mirror")
+            return shapes
         
-        shapes = []
-        docs = shapes_ref.stream()
+        shapes_ref = get_shapes_ref(canvas_id)
         
-        for doc in docs:
-            shape_data = doc.to_dict()
-            shape_data['id'] = doc.id  # Ensure ID is included
-            shapes.append(shape_data)
+        # Ensure ID is included
+        shapes = [{**doc.to_dict(), 'id': doc.id} for doc in shapes_ref.stream()]
         
         logger.info(f"Fetched {len(shapes)} shapes from canvas '{canvas_id}'")
         return shapes
@@ -132,8 +458,7 @@ def get_shape_by_id(shape_id: str, canvas_id: str = "main-canvas") -> Optional[D
         Shape dictionary or None if not found
     """
     try:
-        db = get_firestore_client()
-        doc_ref = db.collection('canvases').document(canvas_id).collection('shapes').document(shape_id)
+        doc_ref = get_shapes_ref(canvas_id).document(shape_id)
         doc = doc_ref.get()
         
         if doc.exists:
@@ -174,13 +499,12 @@ def update_shape(
         True if successful, False otherwise
     """
     try:
-        db = get_firestore_client()
-        doc_ref = db.collection('canvases').document(canvas_id).collection('shapes').document(shape_id)
+        doc_ref = get_shapes_ref(canvas_id).document(shape_id)
         
         # Add metadata (matching frontend behavior)
         update_data = {
             **updates,
-            'updatedAt': firestore.SERVER_TIMESTAMP,
+            'updatedAt': _SERVER_TIMESTAMP,
             'sessionId': session_id,
         }
         
@@ -188,6 +512,7 @@ def update_shape(
             update_data['userId'] = user_id
         
         doc_ref.update(update_data)
+        _mirror_apply(canvas_id, updates=((shape_id, update_data),))
         logger.info(f"Updated shape '{shape_id}' on canvas '{canvas_id}': {list(updates.keys())}")
         return True
     
@@ -218,19 +543,17 @@ def create_shape(
         True if successful, False otherwise
     """
     try:
-        db = get_firestore_client()
-        
         if 'id' not in shape:
             raise ValueError("Shape must have an 'id' field")
         
         shape_id = shape['id']
-        doc_ref = db.collection('canvases').document(canvas_id).collection('shapes').document(shape_id)
+        doc_ref = get_shapes_ref(canvas_id).document(shape_id)
         
         # Add metadata (matching frontend behavior)
         shape_data = {
-            **shape,
-            'createdAt': firestore.SERVER_TIMESTAMP,
-            'updatedAt': firestore.SERVER_TIMESTAMP,
+            **strip_default_fields(shape),
+            'createdAt': _SERVER_TIMESTAMP,
+            'updatedAt': _SERVER_TIMESTAMP,
             'sessionId': session_id,
         }
         
@@ -238,6 +561,7 @@ def create_shape(
             shape_data['userId'] = user_id
         
         doc_ref.set(shape_data)
+        _mirror_apply(canvas_id, sets=((shape_id, shape_data),))
         logger.info(f"Created shape '{shape_id}' (type: {shape.get('type')}) on canvas '{canvas_id}'")
         return True
     
@@ -263,10 +587,10 @@ def delete_shape(
         True if successful, False otherwise
     """
     try:
-        db = get_firestore_client()
-        doc_ref = db.collection('canvases').document(canvas_id).collection('shapes').document(shape_id)
+        doc_ref = get_shapes_ref(canvas_id).document(shape_id)
         
         doc_ref.delete()
+        _mirror_apply(canvas_id, deletes=(shape_id,))
         logger.info(f"Deleted shape '{shape_id}' from canvas '{canvas_id}'")
         return True
     
@@ -284,7 +608,8 @@ def create_shapes_batch(
     """
     Create multiple shapes in a batch operation
     
-    This replicates the frontend's addShapesBatch() function
+    This replicates the frontend's addShapesBatch() function. More than
+    FIRESTORE_BATCH_LIMIT shapes are split into batches committed in parallel.
     
     Args:
         shapes: List of shape dictionaries (each must include 'id' field)
@@ -296,32 +621,30 @@ def create_shapes_batch(
         True if successful, False otherwise
     """
     try:
-        db = get_firestore_client()
-        batch = db.batch()
+        shapes_ref = get_shapes_ref(canvas_id)
+        written = []
+        
+        # Metadata is identical for every shape in the batch
+        metadata = {
+            'createdAt': _SERVER_TIMESTAMP,
+            'updatedAt': _SERVER_TIMESTAMP,
+            'sessionId': session_id,
+        }
         
-        shapes_ref = db.collection('canvases').document(canvas_id).collection('shapes')
+        if user_id:
+            metadata['userId'] = user_id
         
         for shape in shapes:
             if 'id' not in shape:
                 raise ValueError("Each shape must have an 'id' field")
             
-            shape_id = shape['id']
-            doc_ref = shapes_ref.document(shape_id)
-            
-            # Add metadata
-            shape_data = {
-                **shape,
-                'createdAt': firestore.SERVER_TIMESTAMP,
-                'updatedAt': firestore.SERVER_TIMESTAMP,
-                'sessionId': session_id,
-            }
-            
-            if user_id:
-                shape_data['userId'] = user_id
-            
-            batch.set(doc_ref, shape_data)
+            # strip_default_fields already returns a new dict, so add to it in place
+            shape_data = strip_default_fields(shape)
+            shape_data.update(metadata)
+            written.append((shape['id'], shape_data))
         
-        batch.commit()
+        _set_documents(shapes_ref, written)
+        _mirror_apply(canvas_id, sets=written)
         logger.info(f"Created {len(shapes)} shapes in batch on canvas '{canvas_id}'")
         return True
     
@@ -330,6 +653,79 @@ def create_shapes_batch(
         return False
 
 
+def create_shapes_batch_columnar(
+    proto: Dict[str, Any],
+    columns: Dict[str, List[Any]],
+    user_id: str = None,
+    session_id: str = "ai-agent",
+    canvas_id: str = "main-canvas"
+) -> bool:
+    """
+    Create many shapes that share most of their fields in a batch operation
+    
+    Instead of a list of full shape dicts, takes one prototype with the fields
+    common to every shape plus parallel column lists for the fields that vary.
+    Each document is one copy of the prototype plus its column values.
+    More than FIRESTORE_BATCH_LIMIT shapes are split into batches committed
+    in parallel.
+    
+    Args:
+        proto: Fields shared by every shape (type, width, fill, etc.)
+        columns: Field name -> list of per-shape values (must include 'id')
+        user_id: ID of user creating the shapes
+        session_id: Session ID (default: "ai-agent")
+        canvas_id: ID of the canvas (default: "main-canvas")
+    
+    Returns:
+        True if successful, False otherwise
+    
+    Example:
+        create_shapes_batch_columnar(
+            proto={'type': 'rectangle', 'width': 80, 'height': 80, 'fill': '#0000FF'},
+            columns={'id': ['a', 'b'], 'x': [100, 200], 'y': [100, 100]},
+        )
+    """
+    try:
+        if 'id' not in columns:
+            raise ValueError("Columns must include an 'id' column")
+        
+        count = len(columns['id'])
+        if any(len(values) != count for values in columns.values()):
+            raise ValueError("All columns must have the same length")
+        
+        shapes_ref = get_shapes_ref(canvas_id)
+        
+        # Metadata is identical for every shape in the batch
+        base = {
+            **strip_default_fields(proto),
+            'createdAt': _SERVER_TIMESTAMP,
+            'updatedAt': _SERVER_TIMESTAMP,
+            'sessionId': session_id,
+        }
+        
+        if user_id:
+            base['userId'] = user_id
+        
+        column_items = list(columns.items())
+        written = []
+        
+        for i in range(count):
+            shape_data = base.copy()
+            for key, values in column_items:
+                shape_data[key] = values[i]
+            
+            written.append((shape_data['id'], shape_data))
+        
+        _set_documents(shapes_ref, written)
+        _mirror_apply(canvas_id, sets=written)
+        logger.info(f"Created {count} shapes in columnar batch on canvas '{canvas_id}'")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error creating columnar shapes batch: {e}")
+        return False
+
+
 def update_shapes_batch(
     updates: List[Dict[str, Any]],
     user_id: str = None,
@@ -340,7 +736,8 @@ def update_shapes_batch(
     Update multiple shapes in a batch operation
     
     Each update dict must include 'shape_id' to identify which shape to update,
-    plus any fields to update.
+    plus any fields to update. Updates beyond FIRESTORE_BATCH_LIMIT are split
+    into several batches that are committed in parallel.
     
     Args:
         updates: List of update dictionaries, each containing:
@@ -361,34 +758,41 @@ def update_shapes_batch(
     """
     try:
         db = get_firestore_client()
-        batch = db.batch()
+        batches = []
         
-        shapes_ref = db.collection('canvases').document(canvas_id).collection('shapes')
+        shapes_ref = get_shapes_ref(canvas_id)
+        written = []
         
-        for update_item in updates:
+        # Metadata is identical for every update in the batch
+        metadata = {
+            'updatedAt': _SERVER_TIMESTAMP,
+            'sessionId': session_id,
+        }
+        
+        if user_id:
+            metadata['userId'] = user_id
+        
+        for i, update_item in enumerate(updates):
+            if i % FIRESTORE_BATCH_LIMIT == 0:
+                batch = db.batch()
+                batches.append(batch)
+            
             if 'shape_id' not in update_item:
                 raise ValueError("Each update must have a 'shape_id' field")
             
             shape_id = update_item['shape_id']
             doc_ref = shapes_ref.document(shape_id)
             
-            # Extract shape_id and prepare update data
-            update_fields = {k: v for k, v in update_item.items() if k != 'shape_id'}
-            
-            # Add metadata
-            update_data = {
-                **update_fields,
-                'updatedAt': firestore.SERVER_TIMESTAMP,
-                'sessionId': session_id,
-            }
-            
-            if user_id:
-                update_data['userId'] = user_id
+            # Extract shape_id and add metadata
+            update_data = {k: v for k, v in update_item.items() if k != 'shape_id'}
+            update_data.update(metadata)
             
             batch.update(doc_ref, update_data)
+            written.append((shape_id, update_data))
         
-        batch.commit()
-        logger.info(f"Updated {len(updates)} shapes in batch on canvas '{canvas_id}'")
+        _commit_batches(batches)
+        _mirror_apply(canvas_id, updates=written)
+        logger.info(f"Updated {len(updates)} shapes in {len(batches)} batch(es) on canvas '{canvas_id}'")
         return True
     
     except Exception as e:
@@ -417,13 +821,14 @@ def delete_shapes_batch(
         db = get_firestore_client()
         batch = db.batch()
         
-        shapes_ref = db.collection('canvases').document(canvas_id).collection('shapes')
+        shapes_ref = get_shapes_ref(canvas_id)
         
         for shape_id in shape_ids:
             doc_ref = shapes_ref.document(shape_id)
             batch.delete(doc_ref)
         
         batch.commit()
+        _mirror_apply(canvas_id, deletes=shape_ids)
         logger.info(f"Deleted {len(shape_ids)} shapes in batch from canvas '{canvas_id}'")
         return True
     
@@ -434,46 +839,71 @@ def delete_shapes_batch(
 
 # ==================== HELPER FUNCTIONS ====================
 
-def shapes_to_simple_format(shapes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def strip_default_fields(shape: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop fields whose value equals SHAPE_FIELD_DEFAULTS
+    
+    Keeps stored documents (and the write payload) smaller; readers fill
+    the defaults back in.
+    
+    Args:
+        shape: Shape dictionary
+    
+    Returns:
+        New dictionary without default-valued fields
+    """
+    return {
+        k: v for k, v in shape.items()
+        if k not in SHAPE_FIELD_DEFAULTS or SHAPE_FIELD_DEFAULTS[k] != v
+    }
+
+
+def shapes_to_simple_format(shapes: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Convert shapes to a simplified format for the AI agent
     
     Removes metadata fields that might confuse the AI and only keeps
-    the essential shape properties.
+    the essential shape properties. Accepts any iterable (including a
+    generator over Firestore documents) and builds the result in one pass.
+    
+    The projection is written out inline rather than calling a helper per
+    shape: on large canvases the per-shape function call was a noticeable
+    share of the cost.
     
     Args:
-        shapes: List of shape dictionaries from Firestore
+        shapes: Shape dictionaries from Firestore
     
     Returns:
         List of simplified shape dictionaries
     """
     simplified_shapes = []
-    
+    append = simplified_shapes.append
     for shape in shapes:
+        get = shape.get
+        shape_type = get('type')
         simplified = {
-            'id': shape.get('id'),
-            'type': shape.get('type'),
-            'x': shape.get('x'),
-            'y': shape.get('y'),
-            'width': shape.get('width'),
-            'height': shape.get('height'),
-            'fill': shape.get('fill'),
-            'rotation': shape.get('rotation', 0),
+            'id': get('id'),
+            'type': shape_type,
+            'x': get('x'),
+            'y': get('y'),
+            'width': get('width'),
+            'height': get('height'),
+            'fill': get('fill'),
+            'rotation': get('rotation', 0),
         }
         
         # Add type-specific fields
-        if shape.get('type') == 'text':
-            simplified['text'] = shape.get('text')
-            simplified['fontSize'] = shape.get('fontSize')
-            simplified['fontFamily'] = shape.get('fontFamily')
+        if shape_type == 'text':
+            simplified['text'] = get('text')
+            simplified['fontSize'] = get('fontSize')
+            simplified['fontFamily'] = get('fontFamily')
         
         # Add optional fields if present
         if 'stroke' in shape:
-            simplified['stroke'] = shape.get('stroke')
+            simplified['stroke'] = shape['stroke']
         if 'strokeWidth' in shape:
-            simplified['strokeWidth'] = shape.get('strokeWidth')
+            simplified['strokeWidth'] = shape['strokeWidth']
         
-        simplified_shapes.append(simplified)
+        append(simplified)
     
     return simplified_shapes
-
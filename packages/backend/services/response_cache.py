@@ -0,0 +1,120 @@
+"""
+Cache of AI command responses
+
+Asking the same question about the same canvas (e.g. "how many shapes are
+there?" sent twice, or "regenerate" clicked on an answer) gets the same
+reply, so it is served from memory instead of another OpenAI round-trip.
+
+Responses are keyed by the command, canvas, viewport and a hash of the
+canvas's current shapes, so any change to the canvas misses the cache. Only
+turns that left the canvas untouched are stored: replaying a cached "Created
+a red circle" would report a shape that was never created.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+import hashlib
+import threading
+import time
+
+import orjson
+
+# Entries kept before the least recently used one is evicted
+RESPONSE_CACHE_SIZE = 2048
+
+# Seconds a cached response stays valid
+RESPONSE_CACHE_TTL = 300
+
+
+def canvas_state_hash(shapes: List[Dict[str, Any]]) -> str:
+    """
+    Fingerprint a canvas's shapes, independent of their order.
+    
+    Args:
+        shapes: Shape dictionaries including 'id'
+    
+    Returns:
+        Hex digest of the shapes' contents
+    """
+    ordered = sorted(shapes, key=lambda shape: shape.get("id", ""))
+    # default=str covers Firestore timestamps, which orjson can't encode
+    data = orjson.dumps(ordered, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def response_key(
+    command: str,
+    canvas_id: str,
+    viewport: Optional[Dict[str, float]],
+    state_hash: str,
+) -> Hashable:
+    """
+    Build the key a command's response is cached under.
+    
+    Args:
+        command: Natural language command
+        canvas_id: Canvas the command targets
+        viewport: Visible canvas bounds sent with the command
+        state_hash: canvas_state_hash() of the canvas before the command
+    
+    Returns:
+        Hashable cache key
+    """
+    viewport_key = tuple(sorted(viewport.items())) if viewport else None
+    # Case is kept: it matters for commands like "add text 'ABC'"
+    return (command.strip(), canvas_id, viewport_key, state_hash)
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed time
+    
+    Args:
+        maxsize: Maximum number of entries
+        ttl: Seconds an entry stays valid after it is stored
+    """
+    
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+        
+        Returns:
+            A copy of the response, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, response = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+        
+        # Callers add metadata to the shapes, so never hand out the stored ones
+        return {**response, "shapes": [dict(shape) for shape in response["shapes"]]}
+    
+    def set(self, key: Hashable, response: Dict[str, Any]) -> None:
+        """Store a response, evicting the least recently used entry if full."""
+        stored = {**response, "shapes": [dict(shape) for shape in response["shapes"]]}
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every entry (e.g. after the agent's prompt or tools change)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -6,17 +6,52 @@ Uses in-memory storage for simplicity (can be upgraded to Redis for production).
 """
 
 from langchain.memory import ConversationBufferWindowMemory
-from typing import Dict
+from typing import Dict, List, Tuple
+import heapq
 import threading
 import time
 
+
+class Session:
+    """
+    One session's conversation memory and when it was last used
+    
+    Slotted instead of a dict per session, which keeps the session table
+    small when many browser tabs are open.
+    """
+    
+    __slots__ = ("memory", "last_access")
+    
+    def __init__(self, memory: ConversationBufferWindowMemory, last_access: float):
+        self.memory = memory
+        self.last_access = last_access
+
+
 # Global session storage
-_sessions: Dict[str, Dict] = {}
-_lock = threading.Lock()
+_sessions: Dict[str, Session] = {}
+
+# Striped locks: a session only contends with sessions hashing to the same
+# stripe instead of every other lookup
+_LOCK_STRIPES = 32
+_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+# (last_access, session_id) min-heap, one entry per access. Entries older than
+# a session's current last_access are stale and skipped when popped, so the
+# sweep only touches entries that have actually timed out.
+_expiry_heap: List[Tuple[float, str]] = []
+_heap_lock = threading.Lock()
 
 # Session timeout (30 minutes of inactivity)
 SESSION_TIMEOUT = 30 * 60
 
+# How often the background sweep removes expired sessions
+CLEANUP_INTERVAL = 60
+
+
+def _lock_for(session_id: str) -> threading.Lock:
+    """Get the lock stripe guarding a session."""
+    return _locks[hash(session_id) % _LOCK_STRIPES]
+
 
 class SessionManager:
     """Manages conversation memory for multiple sessions."""
@@ -33,29 +68,30 @@ class SessionManager:
         Returns:
             ConversationBufferWindowMemory instance for this session
         """
-        with _lock:
+        with _lock_for(session_id):
             now = time.time()
             
-            # Clean up expired sessions
-            SessionManager._cleanup_expired_sessions(now)
-            
             # Get or create session
-            if session_id not in _sessions:
-                _sessions[session_id] = {
-                    "memory": ConversationBufferWindowMemory(
+            session = _sessions.get(session_id)
+            if session is None:
+                session = _sessions[session_id] = Session(
+                    ConversationBufferWindowMemory(
                         k=k,
                         return_messages=True,
                         memory_key="chat_history",
                         input_key="input",
                         output_key="output"
                     ),
-                    "last_access": now
-                }
+                    now
+                )
             else:
                 # Update last access time
-                _sessions[session_id]["last_access"] = now
+                session.last_access = now
+            
+            with _heap_lock:
+                heapq.heappush(_expiry_heap, (now, session_id))
             
-            return _sessions[session_id]["memory"]
+            return session.memory
     
     @staticmethod
     def clear_session(session_id: str) -> bool:
@@ -68,26 +104,46 @@ class SessionManager:
         Returns:
             True if session was found and cleared, False otherwise
         """
-        with _lock:
+        with _lock_for(session_id):
             if session_id in _sessions:
                 del _sessions[session_id]
                 return True
             return False
     
     @staticmethod
-    def _cleanup_expired_sessions(current_time: float):
-        """Remove sessions that haven't been accessed recently."""
-        expired = [
-            sid for sid, data in _sessions.items()
-            if current_time - data["last_access"] > SESSION_TIMEOUT
-        ]
-        for sid in expired:
-            del _sessions[sid]
-            print(f"Cleaned up expired session: {sid}")
+    def cleanup_expired_sessions(current_time: float = None) -> int:
+        """
+        Remove sessions that haven't been accessed recently.
+        
+        Called periodically by a background task (every CLEANUP_INTERVAL
+        seconds) rather than on every get_memory call. Pops only the expired
+        entries off the access heap, so the cost is O(k log N) for k expired
+        entries instead of a scan over every session.
+        
+        Returns:
+            Number of sessions removed
+        """
+        now = current_time if current_time is not None else time.time()
+        cutoff = now - SESSION_TIMEOUT
+        
+        removed = 0
+        while True:
+            with _heap_lock:
+                if not _expiry_heap or _expiry_heap[0][0] >= cutoff:
+                    break
+                last_access, sid = heapq.heappop(_expiry_heap)
+            
+            with _lock_for(sid):
+                # Only the entry for the session's latest access can expire it
+                session = _sessions.get(sid)
+                if session is not None and session.last_access == last_access:
+                    del _sessions[sid]
+                    removed += 1
+                    print(f"Cleaned up expired session: {sid}")
+        return removed
     
     @staticmethod
     def get_active_sessions_count() -> int:
         """Get count of active sessions."""
-        with _lock:
-            return len(_sessions)
+        return len(_sessions)
 
@@ -22,6 +22,8 @@ export const DEFAULT_SHAPE_HEIGHT = 100;
 export const SHAPE_STROKE_WIDTH = 2;
 export const MIN_DRAG_DISTANCE = 10;
 export const MIN_SHAPE_SIZE = 5;
+// Fields the backend omits from stored shapes when they hold these values
+export const SHAPE_FIELD_DEFAULTS = { stroke: '#000000', strokeWidth: 0, rotation: 0 };
 
 // Text constants
 export const DEFAULT_TEXT_CONTENT = 'Hello World';
@@ -11,7 +11,7 @@ import {
   getDoc
 } from 'firebase/firestore';
 import { db } from './firebase';
-import { FIRESTORE_BATCH_SIZE } from './canvas';
+import { FIRESTORE_BATCH_SIZE, SHAPE_FIELD_DEFAULTS } from './canvas';
 
 // Canvas ID - for MVP, we'll use a single canvas
 const CANVAS_ID = 'main-canvas';
@@ -75,7 +75,8 @@ export const subscribeToShapes = (callback) => {
   return onSnapshot(shapesRef, (snapshot) => {
     const shapes = [];
     snapshot.forEach((doc) => {
-      shapes.push({ id: doc.id, ...doc.data() });
+      // Restore default-valued fields the backend leaves out of the document
+      shapes.push({ ...SHAPE_FIELD_DEFAULTS, id: doc.id, ...doc.data() });
     });
     callback(shapes);
   });